@@ -4,6 +4,7 @@ import logging
 import typing
 
 from ..admin.action.base import RenderHint
+from ..core.cache import serialized_step_cache
 from ..core.naming import AlreadyBoundException, initial_naming_context, NamingContext, NameNotFoundException
 from ..core.serializable import DataclassSerializable
 
@@ -52,6 +53,9 @@ class AdminRoute(object):
         admin_context = cls._admin_routes.bind_new_context((admin.get_name(), str(next_admin)))
         admin_route = cls._admin_routes.bind((admin.get_name(), str(next_admin)), admin)
         LOGGER.debug('Registered admin route: {} -> {}'.format(admin_route, admin))
+        # steps serialized for previously registered admins with the same
+        # name might be outdated
+        serialized_step_cache.invalidate(admin_route[:-1])
         # Create and bind subcontexts for the different type of admin's actions:
         admin_context.bind_new_context('actions')
         admin_context.bind_new_context('field')
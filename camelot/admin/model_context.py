@@ -1,4 +1,5 @@
-from ..core.cache import ValueCache
+from ..core.cache import ColumnarValueCache, SharedValueCache, ValueCache, cache_manager
+from ..core.item_model.prefetch import RowPrefetcher
 from .action.application_action import ApplicationActionModelContext
 
 
@@ -53,17 +54,56 @@ class ObjectsModelContext(ApplicationActionModelContext):
         contains the collection.  For example, if the list shows the addresses of a person,
         the collection is the Person.addresses attribute.
 
+    .. attribute:: prefetcher
+
+        A :class:`camelot.core.item_model.prefetch.RowPrefetcher` that tracks the
+        rows requested by the view, to fill the :attr:`item_cache` ahead of the
+        viewport.  It prefetches at most :attr:`prefetch_budget` rows at once,
+        and never more rows than fit in the :attr:`item_cache` next to the
+        visible rows.
+
     The :attr:`collection_count` and :attr:`selection_count` attributes allow the 
     :meth:`model_run` to quickly evaluate the size of the collection or the
     selection without calling the potentially time consuming methods
     :meth:`get_collection` and :meth:`get_selection`.
+
+    The :attr:`item_cache` of lists with at least :attr:`columnar_cache_columns`
+    columns is a :class:`camelot.core.cache.ColumnarValueCache`, which uses less
+    memory for wide tables.  When :attr:`shared_item_cache` is `True`, the
+    item cache is a :class:`camelot.core.cache.SharedValueCache`, which shares
+    the values of the objects with the other views.  Otherwise, when
+    :attr:`weak_item_cache` is `True`, the item cache keeps only weak
+    references to the objects, so they can be garbage collected once they are
+    expunged from their session.  The item cache is
+    registered with the process wide :data:`camelot.core.cache.cache_manager`,
+    which reports its statistics by admin route, and it holds at most
+    :attr:`item_cache_size` rows.
+
+    When :attr:`role_delta` is `True`, the cells sent to the view are tracked
+    in the :attr:`sent_cells` cache, so updates of the view can contain only
+    the roles that changed, see :class:`camelot.view.crud_action.DataUpdate`.
+    Otherwise :attr:`sent_cells` is `None`.
+
+    Large updates of the view are sent in chunks of at most
+    :attr:`update_chunk_size` rows, see
+    :meth:`camelot.view.crud_action.DataUpdate.chunks`.
     """
+
+    item_cache_size = 100
+    columnar_cache_columns = 30
+    shared_item_cache = False
+    weak_item_cache = False
+    prefetch_budget = 100
+    role_delta = False
+    update_chunk_size = 50
     
     def __init__(self, admin, proxy, locale, collection=None):
         super().__init__(admin)
         self.proxy = proxy
         self.locale = locale
-        self.item_cache = ValueCache(100)
+        self.item_cache = self._create_item_cache(admin, self.item_cache_size)
+        self.prefetcher = RowPrefetcher(self.prefetch_budget)
+        self.sent_cells = ValueCache(self.item_cache_size) if self.role_delta else None
         self.static_field_attributes = []
         self.current_row = None
         self.current_column = None
@@ -77,6 +117,32 @@ class ObjectsModelContext(ApplicationActionModelContext):
         # todo : remove the concept of a validator (taken from CollectionProxy)
         self.validator = admin.get_validator() if admin is not None else None
 
+    @classmethod
+    def _create_item_cache(cls, admin, max_entries):
+        if (admin is not None) and cls.shared_item_cache:
+            field_names = [*admin.get_columns(), *admin.get_extra_columns()]
+            item_cache = SharedValueCache(max_entries, field_names)
+        elif (admin is not None) and (len(admin.get_columns()) >= cls.columnar_cache_columns):
+            item_cache = ColumnarValueCache(max_entries, weak=cls.weak_item_cache)
+        else:
+            item_cache = ValueCache(max_entries, weak=cls.weak_item_cache)
+        cache_manager.register(
+            item_cache, admin.get_admin_route() if admin is not None else None
+        )
+        return item_cache
+
+    def get_stale_rows(self, first_row, last_row):
+        """
+        The rows that need to be read again before the data requested by the
+        view can be sent, because they are not in the :attr:`item_cache`, or
+        because their values were marked as stale by an incremental
+        :class:`camelot.view.action_steps.item_view.RefreshItemView`.
+
+        :return: a `list` of `(first_row, last_row)` tuples with the runs of
+            stale rows between first_row and last_row, both included
+        """
+        return self.item_cache.stale_ranges(first_row, last_row)
+
     def get_selection( self, yield_per = None ):
         """
         :param yield_per: an integer number giving a hint on how many objects
@@ -0,0 +1,113 @@
+#  ============================================================================
+#
+#  Copyright (C) 2007-2016 Conceptive Engineering bvba.
+#  www.conceptive.be / info@conceptive.be
+#
+#  Redistribution and use in source and binary forms, with or without
+#  modification, are permitted provided that the following conditions are met:
+#      * Redistributions of source code must retain the above copyright
+#        notice, this list of conditions and the following disclaimer.
+#      * Redistributions in binary form must reproduce the above copyright
+#        notice, this list of conditions and the following disclaimer in the
+#        documentation and/or other materials provided with the distribution.
+#      * Neither the name of Conceptive Engineering nor the
+#        names of its contributors may be used to endorse or promote products
+#        derived from this software without specific prior written permission.
+#  
+#  THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+#  ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+#  WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+#  DISCLAIMED. IN NO EVENT SHALL <COPYRIGHT HOLDER> BE LIABLE FOR ANY
+#  DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES
+#  (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+#  LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND
+#  ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+#  (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+#  SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+#  ============================================================================
+
+"""
+Benchmark the naming contexts with a large number of bindings, as they
+accumulate in long running sessions.
+"""
+
+import logging
+import sys
+import time
+
+from ..core.naming import BindingStorage, BindingType, initial_naming_context
+
+LOGGER = logging.getLogger(__name__)
+
+
+def _rate(count, function, *args):
+    start = time.perf_counter()
+    function(*args)
+    return count / (time.perf_counter() - start)
+
+
+def bind_unbind(count=1000000):
+    """
+    Bind and unbind a number of names in a context bound in the initial
+    naming context, and resolve them through the initial naming context.
+
+    :return: a `dict` with the number of binds, resolves and unbinds per
+        second
+    """
+    context = initial_naming_context.bind_new_context('benchmark')
+    names = [str(i) for i in range(count)]
+    qual_names = [('benchmark', name) for name in names]
+    obj = object()
+    try:
+
+        def bind():
+            for name in names:
+                context.bind(name, obj)
+
+        def resolve():
+            for qual_name in qual_names:
+                initial_naming_context.resolve(qual_name)
+
+        def unbind():
+            for name in names:
+                context.unbind(name)
+
+        return {
+            'bind': _rate(count, bind),
+            'resolve': _rate(count, resolve),
+            'unbind': _rate(count, unbind),
+        }
+    finally:
+        initial_naming_context.unbind_context('benchmark')
+
+
+def copy_storage(count=1000000):
+    """
+    Copy a binding storage with a number of bindings, of which half are
+    immutable.
+
+    :return: the number of seconds needed for the copy
+    """
+    storage = BindingStorage(BindingType.named_object)
+    obj = object()
+    for i in range(count):
+        storage.add(str(i), obj, immutable=bool(i % 2))
+    start = time.perf_counter()
+    storage.copy()
+    return time.perf_counter() - start
+
+
+def main():
+    logging.basicConfig(level=logging.INFO)
+    count = 1000000
+    rates = bind_unbind(count)
+    LOGGER.info('{} names : {}'.format(count, ', '.join(
+        '{} {:.0f} ops/s'.format(key, value) for key, value in rates.items()
+    )))
+    LOGGER.info('Copy of a binding storage with {} bindings : {:.3f} s'.format(count, copy_storage(count)))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
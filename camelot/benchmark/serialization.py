@@ -0,0 +1,424 @@
+#  ============================================================================
+#
+#  Copyright (C) 2007-2016 Conceptive Engineering bvba.
+#  www.conceptive.be / info@conceptive.be
+#
+#  Redistribution and use in source and binary forms, with or without
+#  modification, are permitted provided that the following conditions are met:
+#      * Redistributions of source code must retain the above copyright
+#        notice, this list of conditions and the following disclaimer.
+#      * Redistributions in binary form must reproduce the above copyright
+#        notice, this list of conditions and the following disclaimer in the
+#        documentation and/or other materials provided with the distribution.
+#      * Neither the name of Conceptive Engineering nor the
+#        names of its contributors may be used to endorse or promote products
+#        derived from this software without specific prior written permission.
+#  
+#  THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+#  ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+#  WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+#  DISCLAIMED. IN NO EVENT SHALL <COPYRIGHT HOLDER> BE LIABLE FOR ANY
+#  DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES
+#  (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+#  LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND
+#  ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+#  (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+#  SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+#  ============================================================================
+
+"""
+Benchmark the serialization of responses sent from the model to the client,
+and of requests sent from the client to the model.
+
+The benchmark builds realistic responses, and measures for each of them the
+number of operations per second of `write_object`, `_to_bytes` and `asdict`,
+the size of the serialized response and the peak memory allocated while
+serializing it.  Only the model side of the protocol is used, so no gui or
+display is needed.
+
+To use the benchmark as a regression gate, save the results of a reference
+run and compare later runs with them ::
+
+    python -m camelot.benchmark.serialization --save reference.json
+    python -m camelot.benchmark.serialization --compare reference.json
+
+The comparison fails when an operation became slower than the reference
+by more than the tolerance, or when a response grew.
+"""
+
+import argparse
+import functools
+import io
+import json
+import logging
+import sys
+import tracemalloc
+
+from . import measure
+from ..admin.icon import CompletionValue
+from ..core import serializable
+from ..core.naming import initial_naming_context
+from ..core.qt import Qt
+from ..view.action_steps.crud import Completion, DataColumn, SetColumns, Update
+from ..view.controls import DelegateType
+from ..view.crud_action import DataCell, DataRowHeader
+from ..view.forms import Form, GridForm, HBoxForm, Label, TabForm, VBoxForm
+from ..view.requests import AbstractRequest, FetchImage
+from ..view.responses import ActionStepped
+
+LOGGER = logging.getLogger(__name__)
+
+
+def _envelope(step):
+    return ActionStepped(
+        run_name=('model_run', '1'), gui_run_name=('gui_run', '1'),
+        blocking=False, step=(type(step).__name__, step),
+    )
+
+
+def data_update_envelope(rows=200, columns=30, columnar=False):
+    """
+    :param columnar: send the cells of the update in columnar format
+
+    :return: an `ActionStepped` response with an `Update` step for a block
+        of rows, as sent for a scrolling table view
+    """
+    changed_ranges = []
+    for row in range(rows):
+        header_item = DataRowHeader(row=row, verbose_identifier='Row {}'.format(row))
+        cells = []
+        for column in range(columns):
+            cell = DataCell(row=row, column=column)
+            cell.roles[Qt.ItemDataRole.DisplayRole.value] = 'value {} {}'.format(row, column)
+            cell.roles[Qt.ItemDataRole.EditRole.value] = row * column
+            cell.roles[Qt.ItemDataRole.ToolTipRole.value] = None
+            cells.append(cell)
+        changed_ranges.append((row, header_item, cells))
+    step = Update(changed_ranges, columnar=columnar)
+    return _envelope(step)
+
+
+class _Delegate(object):
+    """Stand in for a delegate class in the static field attributes"""
+
+    def __init__(self, delegate_type):
+        self.delegate_type = delegate_type
+        self.__name__ = '{}Delegate'.format(delegate_type.name.title().replace('_', ''))
+
+
+class _Admin(object):
+    """Stand in for an admin, with only the methods used by `SetColumns`"""
+
+    def __init__(self, columns):
+        self.columns = columns
+
+    def get_columns(self):
+        return self.columns
+
+
+def set_columns_envelope(columns=30):
+    """
+    :return: an `ActionStepped` response with a `SetColumns` step, as sent
+        when a table view is opened
+    """
+    delegates = [
+        _Delegate(DelegateType.PLAIN_TEXT), _Delegate(DelegateType.INTEGER),
+        _Delegate(DelegateType.FLOAT), _Delegate(DelegateType.DATE),
+    ]
+    static_field_attributes = []
+    for column in range(columns):
+        static_field_attributes.append({
+            'field_name': 'field_{}'.format(column),
+            'name': 'Field {}'.format(column),
+            'column_width': 20,
+            'delegate': delegates[column % len(delegates)],
+            'action_routes': [],
+            'length': 50,
+            'decimal': 2,
+            'nullable': bool(column % 2),
+        })
+    admin = _Admin([fa['field_name'] for fa in static_field_attributes])
+    return _envelope(SetColumns(admin, static_field_attributes))
+
+
+def one2many_columns_envelope(columns=5):
+    """
+    :return: an `ActionStepped` response with a `SetColumns` step for one to
+        many columns, of which the `Any` typed delegate state contains nested
+        dataclasses, including a `NamedDataclassSerializable`.  Such nested
+        dataclasses can not be passed natively to orjson.
+    """
+    delegate = _Delegate(DelegateType.ONE2MANY)
+    static_field_attributes = [{
+        'field_name': 'items_{}'.format(column),
+        'name': 'Items {}'.format(column),
+        'column_width': 40,
+        'delegate': delegate,
+        'admin_route': ('admin', 'item_{}'.format(column)),
+        'columns': ['description', 'amount'],
+        'rows': 5,
+        'action_routes': [],
+    } for column in range(columns)]
+    admin = _Admin([fa['field_name'] for fa in static_field_attributes])
+    step = SetColumns(admin, static_field_attributes)
+    step.columns.append(DataColumn(
+        field_name='remark', verbose_name='Remark', nullable=True, width=20,
+        delegate_type='LabelDelegate', delegate_state={'label': Label('Remark')},
+        default_visible=True,
+    ))
+    return _envelope(step)
+
+
+def form_tree(tabs=5, fields=20):
+    """
+    :return: a tuple with the fields and the form of an `OpenFormView` step,
+        for a form with tabs containing nested forms.  The step itself needs
+        an admin and a proxy, so only the parts of the step that make up most
+        of its payload are built.
+    """
+    field_names = []
+    tab_forms = []
+    for tab in range(tabs):
+        names = ['tab_{}_field_{}'.format(tab, field) for field in range(fields)]
+        field_names.extend(names)
+        half = len(names) // 2
+        tab_forms.append(('Tab {}'.format(tab), VBoxForm([
+            HBoxForm([Form(names[:half]), Form(names[half:], columns=2)]),
+            GridForm([[Label('Remark'), names[0]]]),
+        ])))
+    fields_data = [[field_name, {
+        'hide_title': False,
+        'verbose_name': field_name.replace('_', ' '),
+        'column_span': 1,
+        'minimum_columns': None,
+    }] for field_name in field_names]
+    return fields_data, TabForm(tab_forms)
+
+
+def completions_step(count=500):
+    """
+    :return: a `Completion` step with a list of `CompletionValue` objects,
+        as sent when the user types in a many to one editor
+    """
+    completions = [CompletionValue(
+        value=('object', str(i)), verbose_name='Completion {}'.format(i),
+        tooltip='Tooltip of completion {}'.format(i),
+    ) for i in range(count)]
+    return Completion(row=0, column=1, prefix='Comp', completions=completions)
+
+
+def native_dataclasses_speedup(envelope):
+    """
+    Compare the serialization of an envelope with and without passing
+    native dataclasses to orjson.  Both serializations should produce the
+    same bytes.
+
+    :return: a tuple with the number of serializations per second without and
+        with native dataclasses
+    """
+    native_dataclasses = serializable.json_encoder.native_dataclasses
+    try:
+        serializable.json_encoder.native_dataclasses = False
+        reference = envelope._to_bytes()
+        default_rate = measure(envelope._to_bytes)
+        serializable.json_encoder.native_dataclasses = True
+        assert envelope._to_bytes() == reference
+        native_rate = measure(envelope._to_bytes)
+    finally:
+        serializable.json_encoder.native_dataclasses = native_dataclasses
+    return default_rate, native_rate
+
+
+def peak_allocated(function):
+    """
+    :return: the peak number of bytes allocated while calling function
+    """
+    tracing = tracemalloc.is_tracing()
+    if not tracing:
+        tracemalloc.start()
+    try:
+        function()
+        tracemalloc.reset_peak()
+        current, _peak = tracemalloc.get_traced_memory()
+        function()
+        _current, peak = tracemalloc.get_traced_memory()
+    finally:
+        if not tracing:
+            tracemalloc.stop()
+    return peak - current
+
+
+def benchmark_object(obj):
+    """
+    :param obj: a `DataclassSerializable` object
+
+    :return: a `dict` with the operations per second of `write_object`,
+        `_to_bytes` and `asdict`, the size of the serialized object and the
+        peak number of bytes allocated while serializing it
+    """
+    write_object = lambda: obj.write_object(io.BytesIO())
+    return {
+        'write_object': measure(write_object),
+        '_to_bytes': measure(obj._to_bytes),
+        'asdict': measure(lambda: obj.asdict(obj)),
+        'bytes': len(obj._to_bytes()),
+        'peak_allocated': peak_allocated(write_object),
+    }
+
+
+class _Connection(object):
+    """Connection that serializes the responses, without sending them"""
+
+    def __init__(self):
+        self.nbytes = 0
+
+    def send_response(self, response):
+        self.nbytes += len(response._to_bytes())
+
+
+def benchmark_round_trip():
+    """
+    Time the serialization of a request, its handling by
+    `AbstractRequest.handle_request` and the serialization of the response
+
+    :return: a `dict` with the operations per second and the number of bytes
+        of the request and response
+    """
+    images = initial_naming_context.resolve_context('image')
+    route = images.rebind('benchmark', 'iVBORw0KGgo' * 1000)
+    try:
+        request = FetchImage(route=route)
+        connection = _Connection()
+
+        def round_trip():
+            AbstractRequest.handle_request(request._to_bytes(), connection)
+
+        round_trip()
+        nbytes = len(request._to_bytes()) + connection.nbytes
+        return {
+            'handle_request': measure(round_trip),
+            'bytes': nbytes,
+            'peak_allocated': peak_allocated(round_trip),
+        }
+    finally:
+        images.unbind('benchmark')
+
+
+def cases():
+    """
+    :return: a list of `(name, factory)` tuples, where factory is a function
+        without arguments that builds the object to benchmark.  The objects
+        are built lazily, so a case that fails to build does not prevent the
+        other cases from running.
+    """
+    return [
+        ('ActionStepped(Update 200x30)', data_update_envelope),
+        ('ActionStepped(Update 200x30 columnar)', functools.partial(data_update_envelope, columnar=True)),
+        ('ActionStepped(SetColumns 30)', set_columns_envelope),
+        ('ActionStepped(SetColumns one2many)', one2many_columns_envelope),
+        ('TabForm(5x20)', lambda: form_tree()[1]),
+        ('Completion(500)', completions_step),
+    ]
+
+
+def _run_benchmark(results, name, benchmark):
+    try:
+        results[name] = benchmark()
+    except Exception as e:
+        LOGGER.exception('{} failed'.format(name))
+        results[name] = {'error': repr(e)}
+
+
+def run(native_dataclasses=False):
+    """
+    Run all benchmarks
+
+    :param native_dataclasses: pass native dataclasses to orjson
+
+    :return: a `dict` with the results of each benchmark by name, the result
+        of a benchmark that failed contains only the error
+    """
+    previous = serializable.json_encoder.native_dataclasses
+    serializable.json_encoder.native_dataclasses = native_dataclasses
+    results = dict()
+    try:
+        for name, factory in cases():
+            _run_benchmark(results, name, lambda: benchmark_object(factory()))
+        _run_benchmark(results, 'handle_request(FetchImage)', benchmark_round_trip)
+    finally:
+        serializable.json_encoder.native_dataclasses = previous
+    return results
+
+
+def compare(results, reference, tolerance):
+    """
+    :param tolerance: the allowed relative slowdown, eg. 0.2 for 20 percent
+
+    :return: a list of strings describing the regressions
+    """
+    regressions = []
+    for name, reference_result in reference.items():
+        result = results.get(name)
+        if result is None:
+            continue
+        if 'error' in result:
+            regressions.append('{} : failed with {}'.format(name, result['error']))
+            continue
+        for key, reference_value in reference_result.items():
+            value = result.get(key)
+            if value is None:
+                continue
+            if key == 'bytes':
+                if value > reference_value:
+                    regressions.append('{} : {} bytes instead of {}'.format(name, value, reference_value))
+            elif key != 'peak_allocated':
+                if value < reference_value * (1 - tolerance):
+                    regressions.append('{} : {} {:.1f} ops/s instead of {:.1f}'.format(
+                        name, key, value, reference_value
+                    ))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0].strip())
+    parser.add_argument('--native', action='store_true', help='pass native dataclasses to orjson, and compare with the default serialization')
+    parser.add_argument('--save', help='save the results as json in this file')
+    parser.add_argument('--compare', help='compare the results with those saved in this file')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='allowed relative slowdown')
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO)
+    failed = False
+    if args.native:
+        for name, factory in cases():
+            try:
+                default_rate, native_rate = native_dataclasses_speedup(factory())
+            except Exception:
+                LOGGER.exception('{} failed with native dataclasses'.format(name))
+                failed = True
+                continue
+            LOGGER.info('{} : native dataclasses speedup {:.2f}x ({:.1f} ops/s instead of {:.1f})'.format(
+                name, native_rate / default_rate, native_rate, default_rate
+            ))
+    results = run(args.native)
+    failed = failed or any('error' in result for result in results.values())
+    for name, result in results.items():
+        LOGGER.info('{} : {}'.format(name, ', '.join(
+            '{}={:.1f}'.format(key, value) if isinstance(value, float) else '{}={}'.format(key, value)
+            for key, value in result.items()
+        )))
+    if args.save is not None:
+        with open(args.save, 'w') as results_file:
+            json.dump(results, results_file, indent=2)
+    if args.compare is not None:
+        with open(args.compare) as reference_file:
+            regressions = compare(results, json.load(reference_file), args.tolerance)
+        for regression in regressions:
+            LOGGER.error(regression)
+        if len(regressions):
+            return 1
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -27,7 +27,27 @@
 #
 #  ============================================================================
 
+import bisect
 import collections
+import logging
+import sys
+import time
+import weakref
+
+LOGGER = logging.getLogger(__name__)
+
+
+def _estimate_nbytes(value):
+    """Estimate the number of bytes used by a value, including the items of
+    the builtin containers it holds."""
+    nbytes = sys.getsizeof(value)
+    if isinstance(value, dict):
+        for k, v in value.items():
+            nbytes += _estimate_nbytes(k) + _estimate_nbytes(v)
+    elif isinstance(value, (list, tuple, set, frozenset)):
+        for v in value:
+            nbytes += _estimate_nbytes(v)
+    return nbytes
 
 
 class ValueCache(object):
@@ -44,27 +64,106 @@ class ValueCache(object):
     
     the cache can be queried either by the row number or by object represented 
     by the row data.
+
+    The size of the cache is bounded by the number of entries and optionally
+    by an estimate of the number of bytes used by the cached values.  When
+    one of these limits is exceeded, the oldest entries are removed.
+
+    .. attribute:: nbytes
+
+        the estimated number of bytes used by the values in the cache.
+        Estimating the size of the values is expensive, so when neither the
+        cache nor its :class:`CacheManager` limits the number of bytes, the
+        rows are only estimated when this attribute is read.
+
+    When rows are inserted in or removed from the list, the cached rows can
+    be shifted with :meth:`insert_rows` and :meth:`remove_rows`.  The cached
+    rows are kept in a sorted list, so the cost of a shift depends on the
+    number of cached rows after the shift position, and not on the length
+    of the list.
+
+    .. attribute:: generation
+
+        a counter that is incremented each time the cache is marked as stale
+        with :meth:`mark_stale`.  The values of the rows that were added
+        before that are stale, but they are kept to compare them with the
+        refreshed values, so only the changed values need to be updated.
+
+    .. attribute:: manager
+
+        the :class:`CacheManager` with which the cache is registered, if any.
+
+    The cache counts the hits and misses of :meth:`get_data`, the number of
+    evicted entries, the number of added and changed columns and the highest
+    number of entries it contained.  Those are returned by :meth:`stats`.
+
+    In weak mode, the cache only keeps weak references to the entities.  When
+    an entity is garbage collected, its row is removed from the cache, so the
+    cache does not keep objects alive that were expunged from their session.
+    In this mode, :attr:`rows_by_entity` and :attr:`entities_by_rows` contain
+    weak references instead of the entities themselves.  The garbage collector
+    might run while the cache is being modified, so the rows of collected
+    entities are only removed at the start of the next public method call.
     """
-    def __init__(self, max_entries):
+
+    def __init__(self, max_entries, max_bytes=None, weak=False):
         """:param max_entries: the maximum entries that will be stored in the
-        cache, if more data is added, the oldest data gets removed"""
+        cache, if more data is added, the oldest data gets removed
+        :param max_bytes: the maximum estimated number of bytes used by the
+        values in the cache, `None` if there is no such limit
+        :param weak: `True` if the cache should only keep weak references
+        to the entities"""
         self.max_entries = max_entries
-        self.data_by_rows = collections.defaultdict(dict)
+        self.max_bytes = max_bytes
+        self.weak = weak
+        self.data_by_rows = dict()
         self.rows_by_entity = collections.OrderedDict()
+        self.entities_by_rows = dict()
+        # the estimated bytes of each row, `None` if not yet estimated
+        self.nbytes_by_rows = dict()
+        self._nbytes = 0
+        self._unestimated = 0
+        self.sorted_rows = []
+        self.generation = 0
+        self.generations_by_rows = dict()
+        self._pending_removals = []
+        self.manager = None
+        self.name = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.added_columns = 0
+        self.changed_columns = 0
+        self.max_size = 0
     
     def __repr__(self):
         return u'ValueCache({0.max_entries})'.format(self)
     
     def __len__(self):
         """The number of rows in the cache"""
+        if self._pending_removals:
+            self._purge_pending()
         return len(self.rows_by_entity)
     
+    @property
+    def nbytes(self):
+        if self._unestimated:
+            nbytes_by_rows = self.nbytes_by_rows
+            for row, nbytes in nbytes_by_rows.items():
+                if nbytes is None:
+                    nbytes = nbytes_by_rows[row] = self._estimate_row_nbytes(self._load_values(row))
+                    self._nbytes += nbytes
+            self._unestimated = 0
+        return self._nbytes
+
     def rows(self):
         """
         :return: a interator of the row numbers for which this fifo
         had data
         """
-        return self.data_by_rows.keys()
+        if self._pending_removals:
+            self._purge_pending()
+        return self.entities_by_rows.keys()
 
     def add_data(self, row, entity, values):
         """The entity might already be on another row, and this row
@@ -73,40 +172,837 @@ class ValueCache(object):
         :return: a :class:`set` with all the changed columns in the row
         
         """
-        old_value = self.delete_by_entity(entity)[1]
+        if self._pending_removals:
+            self._purge_pending()
+        changed_columns = set(self._add_values(row, entity, values))
+        self._evict()
+        if self.manager is not None:
+            self.manager.enforce(self)
+        return changed_columns
+
+    def add_range(self, first_row, entities, rows_of_values):
+        """Add the data of a block of consecutive rows at once.
+
+        :param first_row: the row of the first entity
+        :param entities: an iterable with the entities on consecutive rows
+        :param rows_of_values: an iterable with a `dict` of values for each
+            entity
+
+        :return: a `list` of `(first_row, last_row, first_column, last_column)`
+            tuples, with the inclusive ranges of changed cells.  Consecutive
+            rows with changes are merged into a single range, spanning all
+            changed columns of those rows.
+        """
+        if self._pending_removals:
+            self._purge_pending()
+        changed_ranges = []
+        span = None
+        add_values = self._add_values
+        row = first_row
+        for entity, values in zip(entities, rows_of_values):
+            changed_columns = add_values(row, entity, values)
+            if len(changed_columns):
+                first_column = min(changed_columns)
+                last_column = max(changed_columns)
+                if span is None:
+                    span = [row, row, first_column, last_column]
+                    changed_ranges.append(span)
+                else:
+                    span[1] = row
+                    span[2] = min(span[2], first_column)
+                    span[3] = max(span[3], last_column)
+            else:
+                span = None
+            row += 1
+        self._evict()
+        if self.manager is not None:
+            self.manager.enforce(self)
+        return [tuple(span) for span in changed_ranges]
+
+    def _add_values(self, row, entity, values):
+        """Store the values of an entity on a row, without evicting old
+        entries
+
+        :return: a `list` or a view with the changed columns in the row
+        """
+        if self.weak:
+            key = weakref.ref(entity, self._entity_collected)
+        else:
+            key = entity
+        old_value = self._delete_by_key(key)[1]
+        # another entity might be stored on this row
+        self._delete_by_row(row)
         if old_value is None:
             # there was no old data, so everything has changed
-            changed_columns = set(values.keys())
+            changed_columns = values.keys()
             new_values = values
         else:
-            changed_columns = set(col for col, value in values.items() if value != old_value.get(col))
+            changed_columns = [col for col, value in values.items() if value != old_value.get(col)]
             new_values = old_value
             new_values.update(values)
-        self.data_by_rows[row] = new_values
-        self.rows_by_entity[entity] = row
-        if len(self.rows_by_entity)>self.max_entries:
-            entity, _row = self.rows_by_entity.popitem(last=False)
-            self.delete_by_entity(entity)
+        self.rows_by_entity[key] = row
+        self.entities_by_rows[row] = key
+        self._store_values(row, new_values)
+        bisect.insort(self.sorted_rows, row)
+        self.generations_by_rows[row] = self.generation
+        if (self.max_bytes is not None) or ((self.manager is not None) and (self.manager.max_bytes is not None)):
+            nbytes = self._estimate_row_nbytes(new_values)
+            self._nbytes += nbytes
+        else:
+            nbytes = None
+            self._unestimated += 1
+        self.nbytes_by_rows[row] = nbytes
+        self.added_columns += len(values)
+        self.changed_columns += len(changed_columns)
         return changed_columns
 
+    def _evict(self):
+        """Remove the oldest entries until the cache is within its limits,
+        the most recent entry is never removed"""
+        while len(self.rows_by_entity) > 1:
+            if len(self.rows_by_entity) <= self.max_entries:
+                if (self.max_bytes is None) or (self.nbytes <= self.max_bytes):
+                    break
+            self._delete_by_key(next(iter(self.rows_by_entity)))
+            self.evictions += 1
+        self.max_size = max(self.max_size, len(self.rows_by_entity))
+
+    def evict_oldest(self):
+        """Remove the oldest entry from the cache
+        :return: `True` if an entry was removed, `False` if the cache was empty
+        """
+        if self._pending_removals:
+            self._purge_pending()
+        if not len(self.rows_by_entity):
+            return False
+        self._delete_by_key(next(iter(self.rows_by_entity)))
+        self.evictions += 1
+        return True
+
+    def clear(self):
+        """Remove all entries from the cache"""
+        if self._pending_removals:
+            self._purge_pending()
+        while len(self.rows_by_entity):
+            self._delete_by_key(next(iter(self.rows_by_entity)))
+
+    def stats(self):
+        """:return: a `dict` with the counters of the cache"""
+        if self._pending_removals:
+            self._purge_pending()
+        return {
+            'entries': len(self.rows_by_entity),
+            'nbytes': self.nbytes,
+            'max_size': self.max_size,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'added_columns': self.added_columns,
+            'changed_columns': self.changed_columns,
+        }
+
     def get_data(self, row):
         """
         The return value of this function should not be changed.
 
         :return: a `dict` with the cached data in a row, the keys are the columns
         """
-        return self.data_by_rows.get(row, {})
+        if self._pending_removals:
+            self._purge_pending()
+        if self.manager is not None:
+            self.manager.touch(self)
+        if row not in self.entities_by_rows:
+            self.misses += 1
+            return {}
+        self.hits += 1
+        return self._load_values(row)
+
+    def get_entity_data(self, entity, row=None):
+        """
+        The return value of this function should not be changed.
+
+        :param entity: the entity of which to get the data
+        :param row: if not `None`, only return the data if the entity is
+            stored on this row
+
+        :return: a `dict` with the cached data of the entity, the keys are
+            the columns
+        """
+        if self._pending_removals:
+            self._purge_pending()
+        if self.weak:
+            try:
+                entity = weakref.ref(entity)
+            except TypeError:
+                entity = None
+        entity_row = self.rows_by_entity.get(entity)
+        if (entity_row is None) or ((row is not None) and (entity_row != row)):
+            self.misses += 1
+            return {}
+        self.hits += 1
+        return self._load_values(entity_row)
 
     def delete_by_entity(self, entity):
         """Remove everything in the cache related to an entity instance
         returns the row at which the data was stored if the data was in the
         cache, return None otherwise"""
-        try:
-            row = self.rows_by_entity[entity]
-            value = self.data_by_rows.get(row, None)
-            del self.data_by_rows[row]
-            del self.rows_by_entity[entity]      
-        except KeyError:
+        if self._pending_removals:
+            self._purge_pending()
+        if self.weak:
+            try:
+                entity = weakref.ref(entity)
+            except TypeError:
+                return None, None
+        return self._delete_by_key(entity)
+
+    def _delete_by_key(self, key):
+        row = self.rows_by_entity.pop(key, None)
+        if row is None:
             return None, None
+        value = self._discard_values(row)
+        del self.entities_by_rows[row]
+        del self.sorted_rows[bisect.bisect_left(self.sorted_rows, row)]
+        del self.generations_by_rows[row]
+        nbytes = self.nbytes_by_rows.pop(row)
+        if nbytes is None:
+            self._unestimated -= 1
+        else:
+            self._nbytes -= nbytes
         return row, value
 
+    def delete_by_row(self, row):
+        """Remove everything in the cache related to a row
+        returns the entity of which the data was stored if the data was in the
+        cache, return None otherwise"""
+        if self._pending_removals:
+            self._purge_pending()
+        return self._delete_by_row(row)
+
+    def _delete_by_row(self, row):
+        if row not in self.entities_by_rows:
+            return None, None
+        key = self.entities_by_rows[row]
+        value = self._delete_by_key(key)[1]
+        return (key() if self.weak else key), value
+
+    def _entity_collected(self, key):
+        """Queue the row of an entity that has been garbage collected for
+        removal, the cache is not modified here, since this is called by the
+        garbage collector, which might run in the middle of a modification"""
+        self._pending_removals.append(key)
+
+    def _purge_pending(self):
+        """Remove the rows of the entities that were garbage collected"""
+        pending_removals = self._pending_removals
+        while pending_removals:
+            self._delete_by_key(pending_removals.pop())
+
+    def mark_stale(self):
+        """Mark the values of all rows in the cache as stale."""
+        if self._pending_removals:
+            self._purge_pending()
+        self.generation += 1
+
+    def is_stale(self, row):
+        """:return: `True` if the row is not in the cache, or if its values
+        were added before the cache was last marked as stale"""
+        if self._pending_removals:
+            self._purge_pending()
+        return self.generations_by_rows.get(row, -1) < self.generation
+
+    def stale_rows(self):
+        """:return: a `list` with the cached rows that are stale"""
+        if self._pending_removals:
+            self._purge_pending()
+        generation = self.generation
+        return [row for row, row_generation in self.generations_by_rows.items() if row_generation < generation]
+
+    def stale_ranges(self, first_row, last_row):
+        """
+        :return: a `list` of `(first_row, last_row)` tuples with the runs of
+            rows between first_row and last_row, both included, that are stale,
+            and thus should be read again
+        """
+        if self._pending_removals:
+            self._purge_pending()
+        ranges = []
+        for row in range(first_row, last_row + 1):
+            if self.is_stale(row):
+                if len(ranges) and (ranges[-1][1] == row - 1):
+                    ranges[-1] = (ranges[-1][0], row)
+                else:
+                    ranges.append((row, row))
+        return ranges
+
+    def insert_rows(self, at, count):
+        """Shift the cached rows after new rows have been inserted.
+
+        :param at: the row at which the new rows are inserted
+        :param count: the number of rows inserted
+        """
+        if self._pending_removals:
+            self._purge_pending()
+        first = bisect.bisect_left(self.sorted_rows, at)
+        self._shift_rows(first, count)
+
+    def remove_rows(self, at, count):
+        """Remove the cached rows that have been removed, and shift the rows
+        after them.
+
+        :param at: the first row that is removed
+        :param count: the number of rows removed
+        """
+        if self._pending_removals:
+            self._purge_pending()
+        first = bisect.bisect_left(self.sorted_rows, at)
+        last = bisect.bisect_left(self.sorted_rows, at + count)
+        for row in self.sorted_rows[first:last]:
+            self._delete_by_row(row)
+        self._shift_rows(first, -count)
+
+    def _shift_rows(self, first, offset):
+        """Move the cached rows starting from position `first` in the sorted
+        rows by `offset`"""
+        sorted_rows = self.sorted_rows
+        if offset == 0 or first >= len(sorted_rows):
+            return
+        rows = sorted_rows[first:]
+        # move the rows in an order that never overwrites a row that still
+        # needs to be moved
+        for row in (reversed(rows) if offset > 0 else rows):
+            new_row = row + offset
+            entity = self.entities_by_rows.pop(row)
+            self.entities_by_rows[new_row] = entity
+            self.rows_by_entity[entity] = new_row
+            self.nbytes_by_rows[new_row] = self.nbytes_by_rows.pop(row)
+            self.generations_by_rows[new_row] = self.generations_by_rows.pop(row)
+            self._move_values(row, new_row)
+        sorted_rows[first:] = [row + offset for row in rows]
+
+    def _store_values(self, row, values):
+        """Store the `dict` with the values of a row, the row is not yet in
+        the storage, but its entity is in :attr:`entities_by_rows`"""
+        self.data_by_rows[row] = values
+
+    def _load_values(self, row):
+        """:return: a `dict` with the values stored for a row"""
+        return self.data_by_rows[row]
+
+    def _discard_values(self, row):
+        """Remove the values of a row from the storage, its entity is still
+        in :attr:`entities_by_rows`
+        :return: a `dict` with the values that were stored for the row, or
+            `None` if those values can not be used to detect changes"""
+        return self.data_by_rows.pop(row)
+
+    def _move_values(self, row, new_row):
+        """Move the values stored for a row to a new row, the new row is not
+        in the storage"""
+        self.data_by_rows[new_row] = self.data_by_rows.pop(row)
+
+    def _estimate_row_nbytes(self, values):
+        """:return: the estimated number of bytes used to store the values
+        of a row"""
+        return _estimate_nbytes(values)
+
+
+class _Missing(object):
+    """Marker for a column without a value in a slot"""
+
+    def __repr__(self):
+        return 'missing'
+
+_missing = _Missing()
+
+
+class ColumnarValueCache(ValueCache):
+    """
+    A ValueCache that stores the cached rows in fixed slots, with one list
+    per column holding the values of that column for all slots.
+
+    This avoids the overhead of a `dict` per row, which dominates the memory
+    used by the cache for tables with many columns.  Slots of removed rows
+    are kept in a list of free slots and reused for new rows.
+
+    The values of a row are assembled into a new `dict` each time they are
+    requested.
+    """
+
+    def __init__(self, max_entries, max_bytes=None, weak=False):
+        super().__init__(max_entries, max_bytes, weak)
+        del self.data_by_rows
+        self.slots_by_rows = dict()
+        self.values_by_columns = dict()
+        # the cache contains one entry more than max_entries before
+        # the oldest entry is evicted
+        self.free_slots = list(reversed(range(max_entries + 1)))
+        self.capacity = max_entries + 1
+
+    def __repr__(self):
+        return u'ColumnarValueCache({0.max_entries})'.format(self)
+
+    def _store_values(self, row, values):
+        if not len(self.free_slots):
+            for column_values in self.values_by_columns.values():
+                column_values.append(_missing)
+            self.free_slots.append(self.capacity)
+            self.capacity += 1
+        slot = self.free_slots.pop()
+        values_by_columns = self.values_by_columns
+        for column, value in values.items():
+            column_values = values_by_columns.get(column)
+            if column_values is None:
+                column_values = values_by_columns[column] = [_missing] * self.capacity
+            column_values[slot] = value
+        self.slots_by_rows[row] = slot
+
+    def _load_values(self, row):
+        slot = self.slots_by_rows[row]
+        values = dict()
+        for column, column_values in self.values_by_columns.items():
+            value = column_values[slot]
+            if value is not _missing:
+                values[column] = value
+        return values
+
+    def _discard_values(self, row):
+        slot = self.slots_by_rows.pop(row)
+        values = dict()
+        for column, column_values in self.values_by_columns.items():
+            value = column_values[slot]
+            if value is not _missing:
+                values[column] = value
+                column_values[slot] = _missing
+        self.free_slots.append(slot)
+        return values
+
+    def _move_values(self, row, new_row):
+        self.slots_by_rows[new_row] = self.slots_by_rows.pop(row)
+
+    def _estimate_row_nbytes(self, values):
+        # each value takes a pointer in the column list instead of an
+        # entry in a dict
+        nbytes = 0
+        for value in values.values():
+            nbytes += _estimate_nbytes(value) + 8
+        return nbytes
+
+
+class SharedValueStore(object):
+    """
+    Store of the values of entity attributes, shared by multiple
+    :class:`SharedValueCache` objects.
+
+    The values are stored by entity and by field name.  Each entry counts
+    the number of cached rows that refer to it, and is removed when no rows
+    refer to it any more.
+
+    Each entry also has a version that is incremented each time its values
+    change.  A cache that finds a different version than the one it stored
+    itself knows that the values it sent to its view are outdated.
+    """
+
+    def __init__(self):
+        # entity -> [references, version, values by field name]
+        self.entries = dict()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def acquire(self, entity):
+        """Add a reference to the entry of an entity
+        :return: the entry of the entity
+        """
+        entry = self.entries.get(entity)
+        if entry is None:
+            entry = self.entries[entity] = [0, 0, dict()]
+        entry[0] += 1
+        return entry
+
+    def release(self, entity):
+        """Remove a reference to the entry of an entity
+        :return: the entry of the entity
+        """
+        entry = self.entries[entity]
+        entry[0] -= 1
+        if entry[0] <= 0:
+            del self.entries[entity]
+        return entry
+
+    def invalidate(self, entity):
+        """Remove the values of an entity, for example because the entity
+        has been modified or deleted.  Caches with rows of the entity will
+        consider all their values as changed when the row is added again."""
+        entry = self.entries.get(entity)
+        if entry is not None:
+            entry[1] += 1
+            entry[2].clear()
+
+
+shared_value_store = SharedValueStore()
+
+
+class SharedValueCache(ValueCache):
+    """
+    A ValueCache that does not store the values itself, but refers to the
+    entries in a :class:`SharedValueStore`, so the values of entities that
+    appear in multiple views are stored only once.
+
+    :param field_names: a `list` with the field name of each column
+    :param store: the :class:`SharedValueStore` to use, defaults to the
+        process wide :data:`shared_value_store`
+    """
+
+    def __init__(self, max_entries, field_names, max_bytes=None, store=None):
+        super().__init__(max_entries, max_bytes)
+        del self.data_by_rows
+        self.field_names = field_names
+        self.store = store if store is not None else shared_value_store
+        self.entries_by_rows = dict()
+        self.versions_by_rows = dict()
+
+    def __repr__(self):
+        return u'SharedValueCache({0.max_entries})'.format(self)
+
+    def _store_values(self, row, values):
+        entry = self.store.acquire(self.entities_by_rows[row])
+        shared_values = entry[2]
+        field_names = self.field_names
+        changed = False
+        for column, value in values.items():
+            field_name = field_names[column]
+            if (field_name not in shared_values) or (shared_values[field_name] != value):
+                shared_values[field_name] = value
+                changed = True
+        if changed:
+            entry[1] += 1
+        self.entries_by_rows[row] = entry
+        self.versions_by_rows[row] = entry[1]
+
+    def _load_values(self, row):
+        shared_values = self.entries_by_rows[row][2]
+        values = dict()
+        for column, field_name in enumerate(self.field_names):
+            if field_name in shared_values:
+                values[column] = shared_values[field_name]
+        return values
+
+    def _discard_values(self, row):
+        values = self._load_values(row)
+        entry = self.entries_by_rows.pop(row)
+        version = self.versions_by_rows.pop(row)
+        self.store.release(self.entities_by_rows[row])
+        if version != entry[1]:
+            # the values were changed through another cache, so they
+            # are not the values known by the view of this cache
+            return None
+        return values
+
+    def _move_values(self, row, new_row):
+        self.entries_by_rows[new_row] = self.entries_by_rows.pop(row)
+        self.versions_by_rows[new_row] = self.versions_by_rows.pop(row)
+
+    def _estimate_row_nbytes(self, values):
+        # the values are accounted for by each cache that refers to them,
+        # only the references are owned by the cache itself
+        return 8 * len(values)
+
+
+class CacheManager(object):
+    """
+    Process wide register of value caches, that enforces a global limit on
+    the number of entries and the estimated number of bytes used by all
+    registered caches together.
+
+    Each time a cache is viewed, it becomes the most recently viewed cache.
+    When the global limits are exceeded, entries are evicted from the least
+    recently viewed caches first.  The cache in which data is being added is
+    evicted last, and keeps at least one entry.
+
+    Caches are registered through a weak reference, so they are
+    unregistered when they are garbage collected.
+
+    :param max_entries: the maximum number of entries in all caches together,
+        `None` if there is no such limit
+    :param max_bytes: the maximum estimated number of bytes used by all caches
+        together, `None` if there is no such limit
+    :param log_interval: the minimum number of seconds between two log lines
+        with the statistics of the caches, `None` if no statistics should
+        be logged
+    """
+
+    def __init__(self, max_entries=None, max_bytes=None, log_interval=None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.log_interval = log_interval
+        self.last_log_time = time.monotonic()
+        # weak references to the caches, least recently viewed first
+        self._caches = collections.OrderedDict()
+
+    def __len__(self):
+        return len(self._caches)
+
+    def register(self, cache, name=None):
+        """Register a cache with the manager
+
+        :param cache: a :class:`ValueCache`
+        :param name: the name under which the usage of the cache is reported,
+            for example the admin route of the view
+        """
+        key = id(cache)
+        caches = self._caches
+        cache.manager = self
+        cache.name = name
+        caches[key] = weakref.ref(cache, lambda _ref: caches.pop(key, None))
+        self.enforce(cache)
+
+    def unregister(self, cache):
+        """Remove a cache from the manager"""
+        if self._caches.pop(id(cache), None) is not None:
+            cache.manager = None
+
+    def touch(self, cache):
+        """Make a cache the most recently viewed cache"""
+        try:
+            self._caches.move_to_end(id(cache))
+        except KeyError:
+            pass
+
+    def caches(self):
+        """:return: a `list` with the registered caches, least recently viewed
+        first"""
+        caches = []
+        for cache_ref in self._caches.values():
+            cache = cache_ref()
+            if cache is not None:
+                caches.append(cache)
+        return caches
+
+    def usage(self):
+        """:return: a `list` with a `(name, entries, nbytes)` tuple for each
+        registered cache, least recently viewed first"""
+        return [(cache.name, len(cache), cache.nbytes) for cache in self.caches()]
+
+    def entries(self):
+        """:return: the number of entries in all caches together"""
+        return sum(len(cache) for cache in self.caches())
+
+    def nbytes(self):
+        """:return: the estimated number of bytes used by all caches together"""
+        return sum(cache.nbytes for cache in self.caches())
+
+    def _exceeded(self, caches):
+        if (self.max_entries is not None) and (sum(len(cache) for cache in caches) > self.max_entries):
+            return True
+        if (self.max_bytes is not None) and (sum(cache.nbytes for cache in caches) > self.max_bytes):
+            return True
+        return False
+
+    def enforce(self, current=None):
+        """Evict entries until the caches are within the global limits
+
+        :param current: the cache in which data is being added, this cache is
+            evicted last
+        """
+        if self.log_interval is not None:
+            self.log_stats()
+        if (self.max_entries is None) and (self.max_bytes is None):
+            return
+        self.touch(current)
+        caches = self.caches()
+        for cache in caches:
+            if cache is current:
+                continue
+            while self._exceeded(caches) and cache.evict_oldest():
+                pass
+        if current is not None:
+            while self._exceeded(caches) and len(current) > 1:
+                current.evict_oldest()
+
+    def stats(self):
+        """:return: a `dict` with the counters of the registered caches summed
+        by name, a cache has the admin route of its view as name.  On top of
+        the summed counters, the highest `max_size` is reported, as well as the
+        number of caches, the hit ratio and the ratio of changed columns."""
+        stats = dict()
+        for cache in self.caches():
+            cache_stats = cache.stats()
+            name_stats = stats.get(cache.name)
+            if name_stats is None:
+                name_stats = stats[cache.name] = dict(cache_stats, caches=0)
+            else:
+                for key, value in cache_stats.items():
+                    if key == 'max_size':
+                        name_stats[key] = max(name_stats[key], value)
+                    else:
+                        name_stats[key] += value
+            name_stats['caches'] += 1
+        for name_stats in stats.values():
+            requests = name_stats['hits'] + name_stats['misses']
+            name_stats['hit_ratio'] = name_stats['hits'] / requests if requests else None
+            added = name_stats['added_columns']
+            name_stats['changed_ratio'] = name_stats['changed_columns'] / added if added else None
+        return stats
+
+    def log_stats(self, force=False):
+        """Log a line with the statistics of the caches, if at least
+        :attr:`log_interval` seconds passed since the previous line
+
+        :param force: log the statistics regardless of the interval
+        """
+        now = time.monotonic()
+        if not force:
+            if (self.log_interval is None) or (now - self.last_log_time < self.log_interval):
+                return
+        self.last_log_time = now
+        for name, name_stats in self.stats().items():
+            LOGGER.info('Cache {} : {}'.format(
+                '/'.join(name) if isinstance(name, tuple) else name,
+                ', '.join('{}={}'.format(key, value) for key, value in sorted(name_stats.items()))
+            ))
+
+
+cache_manager = CacheManager()
+
+
+class SerializedStepCache(object):
+    """Cache of serialized action steps, or serialized parts of action steps,
+    that depend only on the admin route, the locale and the authorization of
+    the user, such as the columns of a table view.
+
+    Entries are keyed by the step type, the admin route, the locale name and
+    a hashable fingerprint of the authorization, and are evicted in least
+    recently used order.
+
+    :param max_entries: the maximum number of serialized steps to keep
+    """
+
+    def __init__(self, max_entries=1000):
+        self.max_entries = max_entries
+        self.serialized_by_key = collections.OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, step_type, admin_route, locale, auth, factory):
+        """Get a serialized step, creating it when it is not cached
+
+        :param step_type: the name of the step type, or of the part of the
+            step that is serialized, or a hashable tuple with such a name and
+            a fingerprint of the variant of the step
+        :param admin_route: the route of the admin the step belongs to
+        :param locale: the name of the locale the step was created with
+        :param auth: a hashable fingerprint of the authorization of the user,
+            or `None` if the step does not depend on it
+        :param factory: a function without arguments that returns the
+            serialized step, called when the step is not cached
+
+        :return: the serialized step, as returned by the factory
+        """
+        key = (step_type, tuple(admin_route), locale, auth)
+        serialized = self.serialized_by_key.get(key)
+        if serialized is not None:
+            self.hits += 1
+            self.serialized_by_key.move_to_end(key)
+            return serialized
+        self.misses += 1
+        serialized = factory()
+        self.serialized_by_key[key] = serialized
+        while len(self.serialized_by_key) > self.max_entries:
+            self.serialized_by_key.popitem(last=False)
+        return serialized
+
+    def invalidate(self, admin_route):
+        """Remove the serialized steps of all admins with a route starting
+        with admin_route
+        """
+        admin_route = tuple(admin_route)
+        length = len(admin_route)
+        for key in [k for k in self.serialized_by_key if k[1][:length] == admin_route]:
+            del self.serialized_by_key[key]
+
+    def clear(self):
+        """Remove all serialized steps, eg. when the translations change"""
+        self.serialized_by_key.clear()
+
+    def stats(self):
+        return {
+            'entries': len(self.serialized_by_key),
+            'hits': self.hits,
+            'misses': self.misses,
+        }
+
+
+serialized_step_cache = SerializedStepCache()
+
+
+class EncodedImageCache(object):
+    """Cache of the encodings of images, keyed by an identifier of the image
+    content, such as the `cacheKey()` of a `QImage`, which changes when the
+    image is modified.
+
+    Entries are evicted in least recently used order when the number of
+    entries or the total length of the encodings exceeds its limit.
+
+    .. attribute:: evicted
+
+        a function that is called with the key of each evicted entry, or
+        `None`
+    """
+
+    def __init__(self, max_entries=256, max_bytes=16*1024*1024):
+        """:param max_entries: the maximum number of encoded images
+        :param max_bytes: the maximum total length of the encoded images,
+            `None` if there is no such limit"""
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.encoded_by_key = collections.OrderedDict()
+        self.nbytes = 0
+        self.evicted = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, encode):
+        """Get the encoding of an image, encoding it if it is not cached
+
+        :param key: the identifier of the image content
+        :param encode: a function without arguments that returns the encoded
+            image, called when the image is not cached
+
+        :return: the encoded image
+        """
+        encoded = self.encoded_by_key.get(key)
+        if encoded is not None:
+            self.hits += 1
+            self.encoded_by_key.move_to_end(key)
+            return encoded
+        self.misses += 1
+        encoded = encode()
+        self.encoded_by_key[key] = encoded
+        self.nbytes += len(encoded)
+        while len(self.encoded_by_key) > 1:
+            if len(self.encoded_by_key) <= self.max_entries:
+                if (self.max_bytes is None) or (self.nbytes <= self.max_bytes):
+                    break
+            self._remove(next(iter(self.encoded_by_key)))
+            self.evictions += 1
+        return encoded
+
+    def _remove(self, key):
+        self.nbytes -= len(self.encoded_by_key.pop(key))
+        if self.evicted is not None:
+            self.evicted(key)
+
+    def clear(self):
+        """Remove all encoded images"""
+        while len(self.encoded_by_key):
+            self._remove(next(iter(self.encoded_by_key)))
+
+    def stats(self):
+        return {
+            'entries': len(self.encoded_by_key),
+            'nbytes': self.nbytes,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+        }
@@ -0,0 +1,182 @@
+#  ============================================================================
+#
+#  Copyright (C) 2007-2016 Conceptive Engineering bvba.
+#  www.conceptive.be / info@conceptive.be
+#
+#  Redistribution and use in source and binary forms, with or without
+#  modification, are permitted provided that the following conditions are met:
+#      * Redistributions of source code must retain the above copyright
+#        notice, this list of conditions and the following disclaimer.
+#      * Redistributions in binary form must reproduce the above copyright
+#        notice, this list of conditions and the following disclaimer in the
+#        documentation and/or other materials provided with the distribution.
+#      * Neither the name of Conceptive Engineering nor the
+#        names of its contributors may be used to endorse or promote products
+#        derived from this software without specific prior written permission.
+#  
+#  THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+#  ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+#  WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+#  DISCLAIMED. IN NO EVENT SHALL <COPYRIGHT HOLDER> BE LIABLE FOR ANY
+#  DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES
+#  (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+#  LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND
+#  ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+#  (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+#  SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+#  ============================================================================
+
+"""
+Predictive prefetching of row data for item views.
+
+When the user scrolls fast through a large list, each viewport requests its
+rows from the model, and those rows remain empty until the request has been
+handled.  The `RowPrefetcher` keeps track of the recent viewport requests of
+a view, determines the scroll direction and speed, and proposes the rows that
+should be put in the item cache ahead of the viewport when the model is idle.
+"""
+
+import collections
+import logging
+import time
+
+LOGGER = logging.getLogger(__name__)
+
+
+class RowPrefetcher(object):
+    """
+    Track the viewport requests of a single view and determine which rows
+    to prefetch.
+
+    :param budget: the maximum number of rows to prefetch at once
+    :param history: the number of recent viewport requests used to determine
+        the scroll direction and speed
+    :param lookahead: the number of seconds of scrolling at the current speed
+        for which rows are prefetched
+    :param clock: a function returning the current time in seconds
+
+    .. attribute:: used
+
+        the number of prefetched rows that were requested afterwards
+
+    .. attribute:: wasted
+
+        the number of prefetched rows that were scrolled past or removed from
+        the cache before they were requested
+    """
+
+    def __init__(self, budget=100, history=4, lookahead=1.0, clock=time.monotonic):
+        self.budget = budget
+        self.lookahead = lookahead
+        self.clock = clock
+        self.requests = collections.deque(maxlen=history)
+        self.prefetched = set()
+        self.used = 0
+        self.wasted = 0
+
+    def __repr__(self):
+        return u'RowPrefetcher({0.budget})'.format(self)
+
+    def record_request(self, first_row, last_row, item_cache=None):
+        """Register a viewport request of the view
+
+        :param first_row: the first requested row
+        :param last_row: the last requested row, inclusive
+        :param item_cache: the :class:`camelot.core.cache.ValueCache` of the
+            view, to detect prefetched rows that were removed from the cache
+        """
+        self.requests.append((self.clock(), first_row, last_row))
+        if not len(self.prefetched):
+            return
+        used = set(row for row in self.prefetched if first_row <= row <= last_row)
+        self.used += len(used)
+        self.prefetched.difference_update(used)
+        direction = self.direction()
+        wasted = set()
+        for row in self.prefetched:
+            if (direction > 0 and row < first_row) or (direction < 0 and row > last_row):
+                wasted.add(row)
+            elif (item_cache is not None) and (item_cache.is_stale(row)):
+                wasted.add(row)
+        self.wasted += len(wasted)
+        self.prefetched.difference_update(wasted)
+
+    def direction(self):
+        """:return: 1 when scrolling down, -1 when scrolling up, and 0 if
+        the direction is unknown"""
+        if len(self.requests) < 2:
+            return 0
+        delta = self.requests[-1][1] - self.requests[-2][1]
+        return (delta > 0) - (delta < 0)
+
+    def speed(self):
+        """:return: the scroll speed in rows per second over the recent
+        viewport requests"""
+        if len(self.requests) < 2:
+            return 0
+        first_time, first_row, _last_row = self.requests[0]
+        last_time, last_row, _last_row = self.requests[-1]
+        if last_time <= first_time:
+            return 0
+        return abs(last_row - first_row) / (last_time - first_time)
+
+    def next_range(self, row_count, max_entries=None):
+        """
+        :param row_count: the number of rows in the list
+        :param max_entries: the maximum number of entries in the item cache,
+            the prefetched rows should fit in the cache together with the
+            visible rows, otherwise they would evict the visible rows
+        :return: a `(first_row, last_row)` tuple with the inclusive range of
+            rows to prefetch, or `None` if nothing should be prefetched
+        """
+        direction = self.direction()
+        if direction == 0 or self.budget <= 0:
+            return None
+        _time, first_row, last_row = self.requests[-1]
+        visible = last_row - first_row + 1
+        ahead = min(self.budget, max(visible, int(self.speed() * self.lookahead)))
+        if max_entries is not None:
+            ahead = min(ahead, max_entries - visible)
+        if ahead <= 0:
+            return None
+        if direction > 0:
+            first, last = last_row + 1, min(last_row + ahead, row_count - 1)
+        else:
+            first, last = max(first_row - ahead, 0), first_row - 1
+        if first > last:
+            return None
+        return first, last
+
+    def prefetch(self, item_cache, row_count, fetch):
+        """Fill the item cache ahead of the viewport, this method is meant
+        to be called when the model has no pending requests.
+
+        :param item_cache: the :class:`camelot.core.cache.ValueCache` of the view
+        :param row_count: the number of rows in the list
+        :param fetch: a function that takes the first and the last row of an
+            inclusive range, and adds the data of those rows to the item cache.
+            It is called for each run of stale rows, so rows that are
+            already in the cache are not fetched again.
+
+        :return: the number of rows that were prefetched
+        """
+        row_range = self.next_range(row_count, item_cache.max_entries)
+        if row_range is None:
+            return 0
+        count = 0
+        for first, last in item_cache.stale_ranges(*row_range):
+            fetch(first, last)
+            self.prefetched.update(range(first, last + 1))
+            count += last - first + 1
+            LOGGER.debug('Prefetched rows {} to {}'.format(first, last))
+        return count
+
+    def stats(self):
+        """:return: a `dict` with the number of prefetched rows that were used,
+        wasted and still pending"""
+        return {
+            'used': self.used,
+            'wasted': self.wasted,
+            'pending': len(self.prefetched),
+        }
@@ -9,6 +9,7 @@ import datetime
 import decimal
 import functools
 import logging
+import time
 import typing
 import weakref
 
@@ -18,7 +19,7 @@ from camelot.core.qt import QtGui
 from camelot.core.utils import Arity
 
 from decimal import Decimal
-from sqlalchemy import inspect, orm
+from sqlalchemy import inspect, orm, tuple_
 
 from .singleton import Singleton
 
@@ -315,6 +316,40 @@ class AbstractNamingContext(object):
         """
         raise NotImplementedError
 
+    def resolve_many(self, names) -> typing.List[object]:
+        """
+        Retrieve the objects bound to a list of names in the context.
+        Instead of raising an exception for a name that can not be resolved, the exception is returned as the result for that name.
+
+        :param names: a list of names of objects, atomic or composite, and relative to this naming context.
+
+        :return: a list with for each name the bound object, or the `camelot.core.naming.NamingException` raised when resolving it.
+        """
+        results = []
+        for name in names:
+            try:
+                results.append(self.resolve(name))
+            except NamingException as e:
+                results.append(e)
+        return results
+
+    def unbind_many(self, names) -> typing.List[typing.Optional[NamingException]]:
+        """
+        Removes a list of named bindings from the context.
+        Instead of raising an exception for a name that can not be unbound, the exception is returned as the result for that name.
+
+        :param names: a list of names of objects, atomic or composite, and relative to this naming context.
+
+        :return: a list with for each name `None`, or the `camelot.core.naming.NamingException` raised when unbinding it.
+        """
+        results = []
+        for name in names:
+            try:
+                results.append(self.unbind(name))
+            except NamingException as e:
+                results.append(e)
+        return results
+
     def list(self):
         """
         Returns the set of bindings in the naming context.
@@ -342,6 +377,8 @@ class AbstractBindingStorage(object):
     Abstract interface for name-to-object binding storage.
     """
 
+    __slots__ = ()
+
     def add(self, name, obj, immutable=False):
         """
         Store a binding for the given name and object with the given mutability.
@@ -398,37 +435,42 @@ class AbstractBindingStorage(object):
 class BindingStorage(AbstractBindingStorage):
     """
     Default binding storage implementation that stores the bindings in a
-    name-to-object dictionary.
+    name-to-object dictionary, and the names of the immutable bindings in a set,
+    so all operations take constant time, regardless of the number of bindings.
     """
 
+    __slots__ = ('binding_type', '_bindings', '_immutable')
+
     def __init__(self, binding_type):
         self.binding_type = binding_type
         self._bindings = {}
-        self._immutable = []
+        self._immutable = set()
 
     def add(self, name, obj, immutable=False):
-        if name in self._bindings and name in self._immutable:
+        if name in self._immutable and name in self._bindings:
             raise ImmutableBindingException(self.binding_type, name)
         self._bindings[name] = obj
         if immutable:
-            self._immutable.append(name)
+            self._immutable.add(name)
 
     def remove(self, name):
-        if name not in self._bindings:
-            raise NameNotFoundException(name, self.binding_type)
-        if name in self._immutable:
+        if name in self._immutable and name in self._bindings:
             raise ImmutableBindingException(self.binding_type, name)
-        return self._bindings.pop(name)
+        try:
+            return self._bindings.pop(name)
+        except KeyError:
+            raise NameNotFoundException(name, self.binding_type) from None
 
     def get(self, name):
-        if name not in self._bindings:
-            raise NameNotFoundException(name, self.binding_type)
-        return self._bindings[name]
+        try:
+            return self._bindings[name]
+        except KeyError:
+            raise NameNotFoundException(name, self.binding_type) from None
 
     def copy(self):
         duplicate = self.__class__(self.binding_type)
-        for name, obj in self._bindings.items():
-            duplicate.add(name, obj, immutable=name in self._immutable)
+        duplicate._bindings = self._bindings.copy()
+        duplicate._immutable = set(self._immutable)
         return duplicate
 
     def list(self):
@@ -458,16 +500,155 @@ class WeakValueBindingStorage(BindingStorage):
         super().__init__(binding_type)
         self._bindings = weakref.WeakValueDictionary()
 
+class LeaseBindingStorage(BindingStorage):
+    """
+    Binding storage implementation for leases, which are bindings that expire when they have not been resolved
+    during a time-to-live.  Immutable bindings never expire.
+
+    The expiry is tracked with a timer wheel : a ring of slots, each holding the names of the leases that expire
+    during one tick of the wheel.  Each call of :meth:`expire` only visits the slots of the ticks that passed since the
+    previous call.  Resolving a lease only moves its deadline, the lease is moved to the slot of its new deadline when its
+    old slot is visited, so all operations take amortized constant time.
+
+    :param ttl: the number of seconds after which an unresolved lease expires
+    :param resolution: the number of seconds per tick of the wheel
+    :param slots: the number of slots of the wheel
+    :param clock: a function returning the time in seconds
+
+    .. attribute:: expired
+
+        the number of leases that were removed because they expired
+
+    .. attribute:: released
+
+        the number of leases that were removed explicitly
+    """
+
+    __slots__ = ('ttl', 'resolution', 'clock', 'expired', 'released', '_deadlines', '_wheel', '_tick')
+
+    def __init__(self, binding_type, ttl=300, resolution=1.0, slots=64, clock=time.monotonic):
+        super().__init__(binding_type)
+        self.ttl = ttl
+        self.resolution = resolution
+        self.clock = clock
+        self.expired = 0
+        self.released = 0
+        self._deadlines = {}
+        self._wheel = [set() for _i in range(slots)]
+        self._tick = int(clock() / resolution)
+
+    def _schedule(self, name, deadline):
+        self._deadlines[name] = deadline
+        # the slot is visited once the tick after the deadline has started, so the deadline has passed
+        tick = int(deadline / self.resolution) + 1
+        self._wheel[tick % len(self._wheel)].add(name)
+
+    def add(self, name, obj, immutable=False):
+        super().add(name, obj, immutable)
+        if name in self._immutable:
+            self._deadlines.pop(name, None)
+        else:
+            self._schedule(name, self.clock() + self.ttl)
+
+    def remove(self, name):
+        obj = super().remove(name)
+        self._deadlines.pop(name, None)
+        self.released += 1
+        return obj
+
+    def get(self, name):
+        obj = super().get(name)
+        if name in self._deadlines:
+            self._deadlines[name] = self.clock() + self.ttl
+        return obj
+
+    def copy(self):
+        duplicate = self.__class__(self.binding_type, self.ttl, self.resolution, len(self._wheel), self.clock)
+        duplicate._bindings = self._bindings.copy()
+        duplicate._immutable = set(self._immutable)
+        for name, deadline in self._deadlines.items():
+            duplicate._schedule(name, deadline)
+        return duplicate
+
+    def expire(self):
+        """
+        Remove the leases of which the deadline has passed.
+
+        :return: a list with the names of the removed leases
+        """
+        now = self.clock()
+        tick = int(now / self.resolution)
+        expired = []
+        if tick <= self._tick:
+            return expired
+        wheel = self._wheel
+        slots = len(wheel)
+        # after a full rotation, all slots have been visited
+        for passed_tick in range(max(self._tick + 1, tick - slots + 1), tick + 1):
+            slot = wheel[passed_tick % slots]
+            wheel[passed_tick % slots] = set()
+            for name in slot:
+                deadline = self._deadlines.get(name)
+                if deadline is None:
+                    continue
+                if deadline <= now:
+                    del self._deadlines[name]
+                    self._bindings.pop(name, None)
+                    expired.append(name)
+                else:
+                    self._schedule(name, deadline)
+        self._tick = tick
+        self.expired += len(expired)
+        return expired
+
 class NamingContext(AbstractNamingContext):
     """
     Represents a naming context, which consists of a set of name-to-object bindings.
     It implements the AbstractNamingContext interface to provide methods for adding, examining and updating these bindings,
     as well as to define subcontexts that take part in recursive resolving of names.
+
+    Once bound in the initial naming context, the context shares the flat index of the initial naming context,
+    which maps the fully qualified names of all object bindings to the bound objects, and keeps it in sync with its bindings.
+    Contexts of which the object bindings should not be indexed, set `_index_objects` to False.
     """
 
+    _index_objects = True
+
     def __init__(self):
         super().__init__()
         self._bindings = {btype: BindingStorage(btype) for btype in BindingType}
+        self._index = None
+
+    def _index_context(self, index):
+        """
+        Share the index with this context and its subcontexts, and add their object bindings to it.
+        """
+        if not self._index_objects:
+            return
+        self._index = index
+        objects = self._bindings[BindingType.named_object]
+        for (name,) in objects.list():
+            index[(*self._name, name)] = objects.get(name)
+        contexts = self._bindings[BindingType.named_context]
+        for (name,) in contexts.list():
+            context = contexts.get(name)
+            if isinstance(context, NamingContext):
+                context._index_context(index)
+
+    def _unindex_context(self):
+        """
+        Remove the object bindings of this context and its subcontexts from the index, and stop sharing it.
+        """
+        if self._index is None:
+            return
+        for (name,) in self._bindings[BindingType.named_object].list():
+            self._index.pop((*self._name, name), None)
+        contexts = self._bindings[BindingType.named_context]
+        for (name,) in contexts.list():
+            context = contexts.get(name)
+            if isinstance(context, NamingContext):
+                context._unindex_context()
+        self._index = None
 
     @AbstractNamingContext.check_bounded
     def bind(self, name: Name, obj: object, immutable=False) -> CompositeName:
@@ -626,17 +807,27 @@ class NamingContext(AbstractNamingContext):
             raise NamingException(NamingException.Message.invalid_binding_type)
         if len(name) == 1:
             # If binding, check if their exists one already
-            if name[0] in self._bindings[binding_type] and not rebind:
-                raise AlreadyBoundException(name[0], binding_type)
+            if name[0] in self._bindings[binding_type]:
+                if not rebind:
+                    raise AlreadyBoundException(name[0], binding_type)
+                previous = self._bindings[binding_type].get(name[0])
+            else:
+                previous = None
             # Add the object and its mutability to the registry for the given binding_type.
             self._bindings[binding_type].add(name[0], obj, immutable)
             # Determine the full qualified named of the bound object (extending that of this NamingContext).
             qual_name = self.get_qual_name(name[0])
             # If the object is a NamingContext, assign the qualified name.
             if binding_type == BindingType.named_context:
+                if isinstance(previous, NamingContext):
+                    previous._unindex_context()
                 if obj._name is not None:
                     raise AlreadyBoundException(name[0], binding_type)
                 obj._name = qual_name
+                if (self._index is not None) and isinstance(obj, NamingContext):
+                    obj._index_context(self._index)
+            elif self._index is not None:
+                self._index[qual_name] = obj
             return qual_name
         else:
             context = self._bindings[BindingType.named_context].get(name[0])
@@ -708,9 +899,7 @@ class NamingContext(AbstractNamingContext):
         if binding_type not in BindingType:
             raise NamingException(NamingException.Message.invalid_binding_type)
         if len(name) == 1:
-            obj = self._bindings[binding_type].remove(name[0])
-            if binding_type == BindingType.named_context:
-                obj._name = None
+            self._remove_atomic_binding(name[0], binding_type)
         else:
             context = self._bindings[BindingType.named_context].get(name[0])
             if binding_type == BindingType.named_context:
@@ -718,6 +907,105 @@ class NamingContext(AbstractNamingContext):
             elif binding_type == BindingType.named_object:
                 context.unbind(name[1:])
 
+    def _remove_atomic_binding(self, name: str, binding_type: BindingType) -> None:
+        obj = self._bindings[binding_type].remove(name)
+        if binding_type == BindingType.named_context:
+            if isinstance(obj, NamingContext):
+                obj._unindex_context()
+            obj._name = None
+        elif self._index is not None:
+            self._index.pop((*self._name, name), None)
+
+    @AbstractNamingContext.check_bounded
+    def resolve_many(self, names) -> typing.List[object]:
+        """
+        Resolve a list of names in this NamingContext and return the bound objects.
+        The names are grouped by their first atomic part, so each subcontext is resolved and its part validated once
+        for all the names in it.
+        Instead of raising an exception for a name that can not be resolved, the exception is returned as the result for that name.
+
+        :param names: a list of names under which the objects should have been bound, atomic or composite, and relative to this naming context.
+
+        :return: a list with for each name the bound object, or the `camelot.core.naming.NamingException` raised when resolving it.
+
+        :raises:
+            UnboundException NamingException.unbound: if this NamingContext has not been bound to a name yet.
+        """
+        return self._apply_many(names, '_resolve_atomic_binding', 'resolve_many')
+
+    @AbstractNamingContext.check_bounded
+    def unbind_many(self, names) -> typing.List[typing.Optional[NamingException]]:
+        """
+        Removes a list of object bindings from this NamingContext.
+        The names are grouped by their first atomic part, so each subcontext is resolved and its part validated once
+        for all the names in it.
+        Instead of raising an exception for a name that can not be unbound, the exception is returned as the result for that name.
+
+        :param names: a list of names under which the objects should have been bound, atomic or composite, and relative to this naming context.
+
+        :return: a list with for each name `None`, or the `camelot.core.naming.NamingException` raised when unbinding it.
+
+        :raises:
+            UnboundException NamingException.unbound: if this NamingContext has not been bound to a name yet.
+        """
+        return self._apply_many(names, '_unbind_atomic_binding', 'unbind_many')
+
+    def _resolve_atomic_binding(self, name: str) -> object:
+        return self._bindings[BindingType.named_object].get(name)
+
+    def _unbind_atomic_binding(self, name: str) -> None:
+        self._remove_atomic_binding(name, BindingType.named_object)
+
+    def _apply_many(self, names, apply: str, apply_many: str) -> typing.List[object]:
+        """
+        Helper method that implements the batch operations on object bindings.
+
+        :param names: a list of names, atomic or composite, and relative to this naming context.
+        :param apply: the name of the method to call with the atomic name of each binding in a NamingContext.
+        :param apply_many: the name of the batch method to call on subcontexts that are no NamingContext.
+
+        :return: a list with the result of each name, or the `camelot.core.naming.NamingException` raised for it.
+        """
+        results = [None] * len(names)
+        composite_names = []
+        for i, name in enumerate(names):
+            if isinstance(name, str):
+                name = (name,)
+            try:
+                self.validate_composite_name(name)
+            except NamingException as e:
+                results[i] = e
+                continue
+            composite_names.append((i, name))
+        self._apply_many_validated(composite_names, results, apply, apply_many)
+        return results
+
+    def _apply_many_validated(self, composite_names, results, apply, apply_many):
+        groups = collections.defaultdict(list)
+        for i, name in composite_names:
+            if len(name) == 1:
+                try:
+                    self.validate_atomic_name(name[0])
+                    results[i] = getattr(self, apply)(name[0])
+                except NamingException as e:
+                    results[i] = e
+            else:
+                groups[name[0]].append((i, name[1:]))
+        for name, group in groups.items():
+            try:
+                self.validate_atomic_name(name)
+                context = self._bindings[BindingType.named_context].get(name)
+            except NamingException as e:
+                for i, _name in group:
+                    results[i] = e
+                continue
+            if isinstance(context, NamingContext) and (context._name is not None):
+                context._apply_many_validated(group, results, apply, apply_many)
+            else:
+                group_results = getattr(context, apply_many)([name for _i, name in group])
+                for (i, _name), result in zip(group, group_results):
+                    results[i] = result
+
     @AbstractNamingContext.check_bounded
     def resolve(self, name: Name) -> object:
         """
@@ -957,8 +1245,15 @@ class EntityNamingContext(EndpointNamingContext):
 
     :raises:
             AssertionError: if the provided entity class is not a subclass of ´camelot.core.orm.entity.Entity´
+
+    .. attribute:: in_parameters
+
+        the maximum number of bind parameters in a single `IN` query when resolving names in batches,
+        this stays below the limits of older SQLite versions (999 parameters) and Oracle (1000 list items).
     """
 
+    in_parameters = 500
+
     def __init__(self, entity):
         super().__init__()
         from vfinance.model.entity import EntityBase
@@ -1024,6 +1319,73 @@ class EntityNamingContext(EndpointNamingContext):
             raise NameNotFoundException(name[0], BindingType.named_object)
         return instance
 
+    @AbstractNamingContext.check_bounded
+    def resolve_many(self, names) -> typing.List[object]:
+        """
+        Resolve a list of names in this EntityNamingContext and return the bound objects, in the order of the names.
+        The names are grouped by session, and for each session the identity map is checked first, while the instances
+        that are not present in it are queried with `IN` queries on the primary key, each with at most
+        `in_parameters` bind parameters.
+        Instead of raising an exception for a name that can not be resolved, the exception is returned as the result for that name.
+
+        :param names: a list of names under which the objects should have been bound, atomic or composite, and relative to this naming context.
+
+        :return: a list with for each name the bound object, or the `camelot.core.naming.NamingException` raised when resolving it.
+
+        :raises:
+            UnboundException NamingException.unbound: if this NamingContext has not been bound to a name yet.
+        """
+        results = [None] * len(names)
+        # session id -> primary key -> list of (index, name)
+        keys_by_session = collections.defaultdict(lambda: collections.defaultdict(list))
+        for i, name in enumerate(names):
+            try:
+                name = self.get_composite_name(name)
+            except NamingException as e:
+                results[i] = e
+                continue
+            primary_key = tuple(int(name_part) for name_part in name[1:])
+            keys_by_session[int(name[0])][primary_key].append((i, name))
+        mapper = orm.class_mapper(self.entity)
+        for session_id, names_by_key in keys_by_session.items():
+            session = orm.session._sessions.get(session_id)
+            instances = self._get_instances(session, mapper, names_by_key.keys()) if session is not None else {}
+            for primary_key, indexed_names in names_by_key.items():
+                instance = instances.get(primary_key)
+                for i, name in indexed_names:
+                    results[i] = instance if instance is not None else NameNotFoundException(name, BindingType.named_object)
+        return results
+
+    def _get_instances(self, session, mapper, primary_keys) -> typing.Dict[typing.Tuple[int, ...], object]:
+        """
+        Helper method that looks up the instances with the given primary keys in a session.
+
+        :return: a dictionary mapping each primary key that was found to its instance.
+        """
+        instances = {}
+        missing_keys = []
+        for primary_key in primary_keys:
+            instance = session.identity_map.get(mapper.identity_key_from_primary_key(primary_key))
+            if instance is not None:
+                state = inspect(instance)
+                if not (state.expired or state.deleted or state.was_deleted):
+                    instances[primary_key] = instance
+                    continue
+            missing_keys.append(primary_key)
+        columns = mapper.primary_key
+        # keep the number of bind parameters of each query below the limits
+        # of the databases
+        batch_size = max(1, self.in_parameters // len(columns))
+        for i in range(0, len(missing_keys), batch_size):
+            batch = missing_keys[i:i+batch_size]
+            if len(columns) == 1:
+                criterion = columns[0].in_([primary_key[0] for primary_key in batch])
+            else:
+                criterion = tuple_(*columns).in_(batch)
+            for instance in session.query(self.entity).filter(criterion):
+                instances[tuple(mapper.primary_key_from_instance(instance))] = instance
+        return instances
+
     def list(self):
         """
         The database might contain a very large number of entities, to avoid looping over all entities in the
@@ -1039,12 +1401,55 @@ class WeakRefNamingContext(NamingContext):
 
     This means that named object bindings in this context can get unbound in two ways, either explicitly using the unbind functionality, or implicitly by the garbage collection.
     A primary use case for this weak reference naming context is the caching of large objects, that should not be kept alive only because it appears in the cache.
+    Its bindings are not added to the index of the initial naming context, as that would keep the objects alive.
     """
 
+    _index_objects = False
+
     def __init__(self):
         super().__init__()
         self._bindings[BindingType.named_object] = WeakValueBindingStorage(BindingType.named_object)
 
+class LeaseNamingContext(NamingContext):
+    """
+    Specialized naming context for leases, objects that are bound for the client and should be unbound by the client
+    once it no longer needs them.  Leases that are not resolved nor unbound during a time-to-live expire, so they do not
+    keep objects alive when the client never unbinds them.  Expired leases are unbound by :meth:`sweep`.
+    See `camelot.core.naming.LeaseBindingStorage`.
+
+    The leases are not added to the index of the initial naming context, as resolving them through this context
+    extends their time-to-live.
+
+    :param ttl: the number of seconds after which an unresolved lease expires
+    :param resolution: the number of seconds between the sweeps that unbind expired leases
+    """
+
+    _index_objects = False
+
+    def __init__(self, ttl=300, resolution=1.0, clock=time.monotonic):
+        super().__init__()
+        self._bindings[BindingType.named_object] = LeaseBindingStorage(
+            BindingType.named_object, ttl, resolution, clock=clock
+        )
+
+    def sweep(self) -> int:
+        """
+        Unbind the expired leases.
+
+        :return: the number of leases that were unbound
+        """
+        return len(self._bindings[BindingType.named_object].expire())
+
+    def stats(self):
+        """:return: a `dict` with the number of leases, and the number of expired and explicitly released leases"""
+        storage = self._bindings[BindingType.named_object]
+        return {
+            'leases': len(storage),
+            'expired': storage.expired,
+            'released': storage.released,
+        }
+
+
 class InitialNamingContext(NamingContext, metaclass=Singleton):
     """
     Singleton class that is the starting context for performing naming operations.
@@ -1058,6 +1463,9 @@ class InitialNamingContext(NamingContext, metaclass=Singleton):
         # so that it becomes bounded but does not contribute to the full composite name
         # resolution of subcontexts.
         self._name = tuple()
+        # The flat index of the fully qualified names of all object bindings,
+        # shared with the subcontexts.
+        self._index = dict()
 
         # Add immutable bindings for constants' values and contexts for each supported 'constant' python type.
         constants = self.bind_new_context('constant', immutable=True)
@@ -1068,9 +1476,49 @@ class InitialNamingContext(NamingContext, metaclass=Singleton):
         constants.bind('false', False, immutable=True)
         self.bind_new_context('entity', immutable=True)
         self.bind_new_context('object', immutable=True)
-        self.bind_new_context('leases', immutable=True)
+        self.bind_context('leases', LeaseNamingContext(), immutable=True)
+        self.bind_new_context('image', immutable=True)
         self.bind_context('transient', WeakRefNamingContext(), immutable=True)
 
+    def resolve(self, name: Name) -> object:
+        """
+        Resolve a name in this NamingContext and return the bound object.
+        Object bindings in indexed contexts are found with a single lookup in the flat index,
+        other names, such as those of endpoint contexts, are resolved through the context hierarchy.
+
+        :param name: name under which the object should have been bound, atomic or composite, and relative to this naming context.
+
+        :return: the object that was bound under the given name.
+        """
+        try:
+            return self._index[name]
+        except (KeyError, TypeError):
+            return super().resolve(name)
+
+    def resolve_many(self, names) -> typing.List[object]:
+        """
+        Resolve a list of names in this NamingContext and return the bound objects.
+        The names found in the flat index are resolved with a single lookup, the others through the context hierarchy.
+
+        :param names: a list of names under which the objects should have been bound, atomic or composite, and relative to this naming context.
+
+        :return: a list with for each name the bound object, or the `camelot.core.naming.NamingException` raised when resolving it.
+        """
+        index = self._index
+        results = []
+        missing = []
+        for name in names:
+            try:
+                results.append(index[name])
+            except (KeyError, TypeError):
+                missing.append(len(results))
+                results.append(None)
+        if len(missing):
+            missing_results = super().resolve_many([names[i] for i in missing])
+            for i, result in zip(missing, missing_results):
+                results[i] = result
+        return results
+
     def new_context(self) -> NamingContext:
         """
         Create and return a new `camelot.core.naming.NamingContext` instance.
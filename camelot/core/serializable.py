@@ -3,12 +3,16 @@ import datetime
 import functools
 import io
 import base64
+import re
+import typing
+import uuid
 
 import orjson
 
 from camelot.core.qt import QtCore, QtGui
 from enum import Enum
 
+from .cache import EncodedImageCache
 from .utils import ugettext_lazy
 
 
@@ -65,7 +69,66 @@ class Serializable(object):
         intended for use in production code.
         """
         return orjson.loads(self._to_bytes())
-        
+
+
+_native_fragments = hasattr(orjson, 'Fragment')
+
+if _native_fragments:
+    Fragment = orjson.Fragment
+else:
+    class Fragment(object):
+        """
+        Already serialized json, that is written as it is when it is part of
+        an object being serialized.  This replaces `orjson.Fragment` for
+        versions of orjson that do not have it.
+
+        :param contents: the serialized json as `bytes` or `str`
+        """
+
+        __slots__ = ('contents',)
+
+        def __init__(self, contents):
+            self.contents = contents
+
+# Fragments are replaced by a marker string while encoding, when orjson has
+# no native support for them.  The marker contains a NUL character, which
+# orjson escapes, and a random token, so it does not collide with actual data.
+_fragment_token = uuid.uuid4().hex
+_fragment_marker = '\x00fragment:{}:' + _fragment_token + '\x00'
+_fragment_pattern = re.compile(
+    rb'"\\u0000fragment:(\d+):' + _fragment_token.encode() + rb'\\u0000"'
+)
+
+
+# Encoding an image as PNG is expensive, while the same images are serialized
+# over and over, eg. when a column with thumbnails is repainted.
+image_cache = EncodedImageCache()
+
+def _encode_image(image):
+    byte_array = QtCore.QByteArray()
+    buffer = QtCore.QBuffer(byte_array)
+    buffer.open(QtCore.QIODevice.OpenModeFlag.WriteOnly)
+    image.save(buffer, "PNG");
+    return base64.b64encode(byte_array).decode()
+
+def _bind_image(key, encoded):
+    """
+    Bind an encoded image in the 'image' naming context, so the client can
+    fetch it with its route.
+
+    :return: the route of the encoded image
+    """
+    from .naming import initial_naming_context
+    return initial_naming_context.resolve_context('image').rebind(str(key), encoded)
+
+def _unbind_image(key):
+    from .naming import initial_naming_context, NameNotFoundException
+    try:
+        initial_naming_context.resolve_context('image').unbind(str(key))
+    except NameNotFoundException:
+        pass
+
+image_cache.evicted = _unbind_image
 
 def orjson_default(obj):
     if isinstance(obj, ugettext_lazy):
@@ -77,11 +140,11 @@ def orjson_default(obj):
     if isinstance(obj, QtCore.QJsonValue):
         return obj.toVariant()
     if isinstance(obj, QtGui.QImage):
-        byte_array = QtCore.QByteArray()
-        buffer = QtCore.QBuffer(byte_array)
-        buffer.open(QtCore.QIODevice.OpenModeFlag.WriteOnly)
-        obj.save(buffer, "PNG");
-        return base64.b64encode(byte_array).decode()
+        key = obj.cacheKey()
+        encoded = image_cache.get(key, functools.partial(_encode_image, obj))
+        if json_encoder.image_routes:
+            return _bind_image(key, encoded)
+        return encoded
         # FIXME: Remove this when all classes are serializable.
         #        Currently needed to serialize some fields
         #        (e.g. RouteWithRenderHint) from SetColumns._to_dict().
@@ -99,9 +162,49 @@ def orjson_default(obj):
 
 
 class DataclassEncoderOrjson:
+    """
+    :param native_dataclasses: when True, `DataclassSerializable.write_object`
+        passes the dataclasses that need no custom serialization as they are to
+        orjson, which serializes them natively, instead of converting them to
+        dictionaries first.  See `_is_native_type` for the conditions such a
+        dataclass should meet.
+
+    .. attribute:: known_type_ids
+
+        the number of type ids of `NamedDataclassSerializable` classes known
+        by the client.  Objects of those classes are serialized with their
+        type id instead of their class name, see
+        `MetaNamedDataclassSerializable`.
+
+    :param image_routes: when True, images are not serialized inline, but
+        bound in the 'image' naming context, and their route is serialized
+        instead.  The client can then fetch the encoded images separately,
+        with the `FetchImage` request.
+    """
+
+    def __init__(self, native_dataclasses=False, image_routes=False):
+        self.native_dataclasses = native_dataclasses
+        self.known_type_ids = 0
+        self.image_routes = image_routes
 
     def encode(self, obj):
-        return orjson.dumps(obj, default=orjson_default, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_SUBCLASS)
+        if _native_fragments:
+            return orjson.dumps(obj, default=orjson_default, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_SUBCLASS)
+        fragments = []
+
+        def default(obj):
+            if type(obj) is Fragment:
+                fragments.append(obj.contents)
+                return _fragment_marker.format(len(fragments) - 1)
+            return orjson_default(obj)
+
+        data = orjson.dumps(obj, default=default, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_SUBCLASS)
+        if len(fragments):
+            def splice(match):
+                contents = fragments[int(match.group(1))]
+                return contents if isinstance(contents, bytes) else contents.encode()
+            data = _fragment_pattern.sub(splice, data)
+        return data
 
     def iterencode(self, obj):
         yield orjson.dumps(obj, default=orjson_default, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_SUBCLASS)
@@ -139,14 +242,187 @@ def _dataclass_fields(t):
     """
     return dataclasses.fields(t)
 
+_primitive_types = frozenset([str, int, float, bool, bytes, type(None)])
+
+def _may_hold_dataclass(field_type):
+    """
+    Return False if values of the given field type can never contain a
+    dataclass, so they can be serialized without recursion.  Types that are
+    unknown, such as unresolved forward references or `typing.Any`, may hold
+    a dataclass.
+    """
+    if field_type in _primitive_types:
+        return False
+    if isinstance(field_type, type) and issubclass(field_type, Enum):
+        return False
+    origin = typing.get_origin(field_type)
+    if origin in (typing.Union, tuple, list, dict, frozenset, set):
+        args = [arg for arg in typing.get_args(field_type) if arg is not Ellipsis]
+        if len(args) == 0:
+            return True
+        return any(_may_hold_dataclass(arg) for arg in args)
+    if origin is typing.Literal:
+        return False
+    return True
+
+@functools.lru_cache(None)
+def _dataclass_serializer(t, native=False):
+    """
+    Return a function that serializes the fields of an instance of the
+    dataclass type t into a dictionary, as the default
+    `DataclassSerializable.serialize_fields` does.
+
+    The function is generated once for each type : it reads the fields
+    directly, and only recurses into the fields whose declared type may hold
+    nested dataclasses.  When native is True, the recursion leaves the
+    dataclasses that orjson can serialize natively as they are.
+    """
+    try:
+        type_hints = typing.get_type_hints(t)
+    except Exception:
+        type_hints = dict()
+    lines = ['def serialize(obj):', '    return {']
+    for f in _dataclass_fields(t):
+        field_type = type_hints.get(f.name, typing.Any)
+        if _may_hold_dataclass(field_type):
+            lines.append('        {0!r}: _inner(obj.{0}),'.format(f.name))
+        else:
+            lines.append('        {0!r}: obj.{0},'.format(f.name))
+    lines.append('    }')
+    if native:
+        namespace = {'_inner': DataclassSerializable._asnative_inner}
+    else:
+        namespace = {'_inner': DataclassSerializable._asdict_inner}
+    exec('\n'.join(lines), namespace)
+    serializer = namespace['serialize']
+    serializer.__qualname__ = '{}.serialize'.format(t.__qualname__)
+    return serializer
+
+_native_types = dict()
+
+def _is_native_type(t):
+    """
+    Check if instances of the dataclass type t can be serialized natively by
+    orjson, with the same result as `DataclassSerializable.asdict`.
+
+    orjson serializes the public attributes in the `__dict__` of a dataclass,
+    so this requires that :
+        * t uses the default `serialize_fields`, and is thus not a
+          `NamedDataclassSerializable`
+        * all fields are public and are stored on the instance, which is not
+          the case for fields with `init=False` and a default value
+        * the fields hold no dataclasses, or only dataclasses that are native
+          themselves.
+
+    :return: `None` if the type is not native, otherwise a tuple with the
+        names of the fields of which the declared type might hold other
+        dataclasses, such as fields declared as `typing.Any`.  The values of
+        those fields, as well as whether an instance has additional
+        attributes, can only be verified at runtime, see `_is_native_object`.
+    """
+    try:
+        return _native_types[t]
+    except KeyError:
+        pass
+    # assume the type is native while its fields are inspected, to
+    # support recursive types
+    _native_types[t] = tuple()
+    native = _native_types[t] = _check_native_type(t)
+    return native
+
+def _check_native_type(t):
+    if not (_is_dataclass_type(t) and issubclass(t, DataclassSerializable)):
+        return None
+    if t.serialize_fields.__func__ is not DataclassSerializable.serialize_fields.__func__:
+        return None
+    try:
+        type_hints = typing.get_type_hints(t)
+    except Exception:
+        type_hints = {}
+    runtime_fields = []
+    for f in _dataclass_fields(t):
+        if f.name.startswith('_'):
+            return None
+        if (f.init is False) and (f.default is not dataclasses.MISSING):
+            return None
+        if not _is_native_field_type(type_hints.get(f.name, typing.Any)):
+            runtime_fields.append(f.name)
+    return tuple(runtime_fields)
+
+def _is_native_field_type(field_type):
+    """
+    :return: True if all values of the declared field type can be serialized
+        natively, False if this should be verified at runtime
+    """
+    if not _may_hold_dataclass(field_type):
+        return True
+    origin = typing.get_origin(field_type)
+    if origin in (typing.Union, tuple, list, dict, frozenset, set):
+        args = [arg for arg in typing.get_args(field_type) if arg is not Ellipsis]
+        return len(args) > 0 and all(_is_native_field_type(arg) for arg in args)
+    # a field declared as a dataclass type might hold an instance of a
+    # subclass, which is only native if the declared type has no subclasses
+    if isinstance(field_type, type) and _is_dataclass_type(field_type):
+        return (_is_native_type(field_type) == tuple()) and (len(field_type.__subclasses__()) == 0)
+    # `typing.Any`, unresolved and other types might hold dataclasses that
+    # orjson would serialize differently
+    return False
+
+def _holds_no_dataclass(value):
+    """
+    Runtime verification of the value of a field of which the declared type
+    might hold dataclasses.
+    """
+    t = type(value)
+    if t in _primitive_types:
+        return True
+    if t is dict:
+        return all(_holds_no_dataclass(v) for v in value.values())
+    if (t is list) or (t is tuple):
+        return all(_holds_no_dataclass(v) for v in value)
+    return not _is_dataclass_type(t)
+
+def _is_native_object(obj):
+    """
+    :return: True if the dataclass obj can be passed as it is to orjson
+    """
+    t = type(obj)
+    runtime_fields = _is_native_type(t)
+    if runtime_fields is None:
+        return False
+    attributes = obj.__dict__
+    if attributes.keys() != _native_field_names(t):
+        return False
+    for name in runtime_fields:
+        if not _holds_no_dataclass(attributes[name]):
+            return False
+    return True
+
+@functools.lru_cache(None)
+def _native_field_names(t):
+    """
+    Return the names of the fields of a native dataclass type, as a keys view
+    that can be compared with the keys of the `__dict__` of an instance.
+    """
+    return dict.fromkeys(f.name for f in _dataclass_fields(t)).keys()
+
 class DataclassSerializable(Serializable):
     """
     Use the dataclass info to serialize the object
     """
 
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        # a new subclass might make fields declared with one of its base
+        # classes non native
+        _native_types.clear()
+
     def write_object(self, stream):
         # for chunk in json_encoder.iterencode(self.asdict(self)):
         #     stream.write(chunk.encode())
+        if json_encoder.native_dataclasses:
+            stream.write(json_encoder.encode(self._asnative_inner(self)))
+            return
         stream.write(json_encoder.encode(self.asdict(self)))
         # TODO: favored encode() over iterencode(), as the latter is actually slower for small objects.
         #   encode() is a thin wrapper around json.dumps implemented in C (CPython’s json module uses C accelerators when possible),
@@ -158,6 +434,17 @@ class DataclassSerializable(Serializable):
         # * use orjson or another 3rd party json library that is faster than the built-in json module.
         #   e.g., https://github.com/ijl/orjson
     
+    def encode_fragment(self):
+        """
+        Serialize the object once, so the result can be embedded in other
+        objects without being serialized again.
+
+        :return: a `Fragment` with the serialized object
+        """
+        stream = io.BytesIO()
+        self.write_object(stream)
+        return Fragment(stream.getvalue())
+
     @classmethod
     def asdict(cls, obj):
         """
@@ -182,21 +469,54 @@ class DataclassSerializable(Serializable):
             return tuple(cls._asdict_inner(v) for v in obj)
         return obj
 
+    @classmethod
+    def _asnative_inner(cls, obj):
+        """
+        Variant of `_asdict_inner` that leaves the dataclasses that orjson can
+        serialize natively as they are.
+        """
+        t = type(obj)
+        if _is_dataclass_type(t):
+            if _is_native_object(obj):
+                return obj
+            serialize_fields = t.serialize_fields.__func__
+            if serialize_fields is DataclassSerializable.serialize_fields.__func__ or \
+               serialize_fields is NamedDataclassSerializable.serialize_fields.__func__:
+                return t._serialize_native(obj)
+            return t.serialize_fields(obj)
+        if t is dict:
+            return {k: cls._asnative_inner(v) for k, v in obj.items()}
+        if t is list:
+            return [cls._asnative_inner(v) for v in obj]
+        if t is tuple:
+            return tuple(cls._asnative_inner(v) for v in obj)
+        return obj
+
+    @classmethod
+    def _serialize_native(cls, obj):
+        """
+        Variant of the default `serialize_fields` used by `_asnative_inner`.
+        """
+        return _dataclass_serializer(type(obj), True)(obj)
+
     @classmethod
     def serialize_fields(cls, obj):
         """
         Serialize the given dataclass object's fields.
         By default this will return a dictionary with each field turned into a key-value pair of its name and its value.
         """
-        result = []
-        for f in _dataclass_fields(type(obj)):
-            value = cls._asdict_inner(getattr(obj, f.name))
-            result.append((f.name, value))
-        return dict(result)
+        return _dataclass_serializer(type(obj))(obj)
 
 class MetaNamedDataclassSerializable(type):
+    """
+    Registers each class by its name, and assigns it a numeric type id, in
+    order of registration.  Once the table with the type ids has been sent to
+    the client, objects are serialized with their type id instead of their
+    name, see `DataclassEncoderOrjson.known_type_ids`.
+    """
 
     cls_register = dict()
+    cls_by_type_id = list()
 
     def __new__(cls, clsname, bases, attrs):
         newclass = super().__new__(cls, clsname, bases, attrs)
@@ -204,12 +524,44 @@ class MetaNamedDataclassSerializable(type):
             if clsname in cls.cls_register:
                 raise ValueError(f"Class with name {clsname} already registered.")
             cls.cls_register[clsname] = newclass
+            newclass._type_id = len(cls.cls_by_type_id)
+            cls.cls_by_type_id.append(newclass)
         return newclass
 
     @classmethod
     def get_cls_by_name(cls, cls_name):
         return cls.cls_register.get(cls_name)
 
+    @classmethod
+    def get_cls_by_type_id(cls, type_id):
+        if 0 <= type_id < len(cls.cls_by_type_id):
+            return cls.cls_by_type_id[type_id]
+
+    @classmethod
+    def get_cls(cls, type_key):
+        """
+        :param type_key: the type id or the name of a registered class
+        """
+        if isinstance(type_key, int):
+            return cls.get_cls_by_type_id(type_key)
+        return cls.get_cls_by_name(type_key)
+
+    @classmethod
+    def get_type_names(cls):
+        """
+        :return: a list with the names of the registered classes, the index
+            of each name is the type id of the class
+        """
+        return [registered_cls.__name__ for registered_cls in cls.cls_by_type_id]
+
+def _type_key(t):
+    """
+    :return: the type id of t if the client knows it, otherwise its name
+    """
+    if t._type_id < json_encoder.known_type_ids:
+        return t._type_id
+    return t.__name__
+
 class NamedDataclassSerializable(DataclassSerializable, metaclass=MetaNamedDataclassSerializable):
     """
     Extended DataclassSerializable interface for object classes that should be able to be deserialized.
@@ -218,8 +570,13 @@ class NamedDataclassSerializable(DataclassSerializable, metaclass=MetaNamedDatac
         and the default serialized fields data.
       * The same concrete class name is used the register each concrete class implementation on this class' metaclass.
         When deserializing, the serialized class name can then be used to lookup the corresponding registered class.
+      * Once the client knows the numeric type ids of the registered classes, those replace the class names.
     """
     
     @classmethod
     def serialize_fields(cls, obj): 
-        return type(obj).__name__, super(NamedDataclassSerializable, cls).serialize_fields(obj)
+        return _type_key(type(obj)), super(NamedDataclassSerializable, cls).serialize_fields(obj)
+
+    @classmethod
+    def _serialize_native(cls, obj):
+        return _type_key(type(obj)), super(NamedDataclassSerializable, cls)._serialize_native(obj)
@@ -50,7 +50,8 @@ from .select_file import SelectFile, SelectDirectory, SaveFile, FileNameFilter
 from .select_object import SelectObjects, SelectObject
 from .update_progress import UpdateProgress, PushProgressLevel, PopProgressLevel, SetProgressAnimate
 from .crud import (
-    SetColumns, Completion, CompletionValue, Created, RowCount, Update, ChangeSelection
+    SetColumns, Completion, CompletionValue, Created, RowCount, Update, ChangeSelection,
+    SerializedStep,
 )
 
 __all__ = [
@@ -92,6 +93,7 @@ __all__ = [
     FileNameFilter.__name__,
     SelectObjects.__name__,
     SelectObject.__name__,
+    SerializedStep.__name__,
     SetColumns.__name__,
     Sort.__name__,
     StartProfiler.__name__,
@@ -35,6 +35,7 @@ from ...admin.action.base import ActionStep, State, ModelContext
 from ...admin.action.application_action import model_context_naming, model_context_counter
 from ...admin.admin_route import AdminRoute, Route
 from ...admin.menu import MenuItem
+from ...core.cache import serialized_step_cache
 from ...core.naming import initial_naming_context
 from ...core.serializable import DataclassSerializable
 
@@ -191,6 +192,10 @@ class InstallTranslator(ActionStep, DataclassSerializable):
     blocking = False
     language: str
 
+    def __post_init__(self):
+        # serialized steps contain strings in the previous language
+        serialized_step_cache.clear()
+
 
 @dataclass
 class RemoveTranslators(ActionStep, DataclassSerializable):
@@ -198,6 +203,9 @@ class RemoveTranslators(ActionStep, DataclassSerializable):
     Unregister all previously installed translators from the application.
     """
 
+    def __post_init__(self):
+        serialized_step_cache.clear()
+
 
 @dataclass
 class UpdateActionsState(ActionStep, DataclassSerializable):
@@ -7,7 +7,9 @@ from camelot.view.controls import DelegateType
 from camelot.admin.admin_route import Route
 from camelot.admin.action.base import ActionStep, State
 from camelot.admin.icon import CompletionValue
-from camelot.core.serializable import DataclassSerializable
+from camelot.core.cache import serialized_step_cache
+from camelot.core.qt import QtCore
+from camelot.core.serializable import DataclassSerializable, Fragment
 from camelot.view.crud_action import CrudActions, DataUpdate
 from camelot.view.utils import get_settings_group
 
@@ -23,6 +25,21 @@ def filter_attributes(attributes, keys):
     return filtered
 
 
+@dataclass
+class SerializedStep(ActionStep):
+    """
+    An action step that has been serialized before, and is sent to the client
+    as it is.
+
+    :param step_type: the name of the type of the serialized step
+    :param fragment: the serialized step
+    """
+
+    step_type: str
+    fragment: Fragment
+    blocking: bool = False
+
+
 @dataclass
 class RowCount(ActionStep, DataclassSerializable):
 
@@ -67,6 +84,38 @@ class SetColumns(ActionStep, DataclassSerializable):
                 default_visible = field_name in columns
             ))
 
+    @classmethod
+    def serialized(cls, admin, static_field_attributes=None, auth=None):
+        """
+        Get the serialized columns of an admin from the serialized step cache,
+        the step is only created and serialized when it is not cached.
+
+        :param admin: the admin of which to set the columns
+        :param static_field_attributes: the static field attributes of the
+            columns, defaults to those of all columns of the admin.  The
+            columns are cached by their field names, so the static field
+            attributes of the same fields should not differ between calls.
+        :param auth: a hashable fingerprint of the authorization of the user,
+            if the columns depend on it
+
+        :return: a :class:`SerializedStep`
+        """
+
+        def serialize():
+            fields = static_field_attributes
+            if fields is None:
+                fields = admin.get_static_field_attributes(admin.get_columns())
+            return cls(admin, fields).encode_fragment()
+
+        step_type = cls.__name__
+        if static_field_attributes is not None:
+            step_type = (step_type, tuple(fa['field_name'] for fa in static_field_attributes))
+        fragment = serialized_step_cache.get(
+            step_type, admin.get_admin_route(), QtCore.QLocale().name(),
+            auth, serialize
+        )
+        return SerializedStep(cls.__name__, fragment, cls.blocking)
+
     def get_delegate_state(self, static_field_attributes):
         fa = static_field_attributes
         delegate_type = fa['delegate'].delegate_type
@@ -31,16 +31,17 @@
 Various ``ActionStep`` subclasses to create and manipulate a form view in the
 context of the `Qt` model-view-delegate framework.
 """
-from dataclasses import dataclass, field
-from typing import Dict, Optional
+from dataclasses import InitVar, dataclass, field
+from typing import Any, Optional
 
 from .item_view import AbstractCrudView
-from ..forms import AbstractForm
 from ...admin.action.base import ActionStep
 from ...admin.admin_route import Route, AdminRoute
+from ...core.cache import serialized_step_cache
 from ...core.item_model import AbstractModelProxy
 from ...core.naming import initial_naming_context
-from ...core.serializable import DataclassSerializable
+from ...core.qt import QtCore
+from ...core.serializable import DataclassSerializable, Fragment, json_encoder
 
 from vfinance.view.controls.delegates.richtextdelegate import RichTextDelegate
 
@@ -51,6 +52,10 @@ class OpenFormView(AbstractCrudView):
     :param object: the object to display in the form view.
     :param proxy: a model proxy that represents the underlying collection where the given object is part of.
     :param admin: the admin class to use to display the form
+    :param auth: a hashable fingerprint of the authorization of the user, to
+        be passed when the fields or the form of the admin depend on it.  The
+        serialized fields and form are cached by admin route and locale, so
+        when this is `None`, they are shared by all users.
 
     .. attribute:: row
 
@@ -71,8 +76,10 @@ class OpenFormView(AbstractCrudView):
 
     """
 
-    fields: Dict[str, dict] = field(init=False)
-    form: AbstractForm = field(init=False)
+    auth: InitVar[Any] = None
+
+    fields: Fragment = field(init=False)
+    form: Fragment = field(init=False)
     admin_route: AdminRoute = field(init=False)
     row: int = field(init=False)
     form_state: str = field(init=False)
@@ -80,17 +87,21 @@ class OpenFormView(AbstractCrudView):
     qml: bool = False
     auto_update: bool = True
 
-    def __post_init__(self, value, admin, proxy):
+    def __post_init__(self, value, admin, proxy, auth):
         assert value is not None
         assert (proxy is None) or (isinstance(proxy, AbstractModelProxy))
-        self.fields = [[f, {
-            'hide_title':fa.get('hide_title', False),
-            'verbose_name':str(fa['name']),
-            'column_span': fa.get('column_span', 1),
-            'minimum_columns': self._minimum_columns(admin, fa),
-            }] for f, fa in admin.get_fields()]
-        self.form = admin.get_form_display()
         self.admin_route = admin.get_admin_route()
+        # the fields and the form only depend on the admin, the locale and
+        # the authorization, so they are serialized once
+        locale = QtCore.QLocale().name()
+        self.fields = serialized_step_cache.get(
+            'OpenFormView.fields', self.admin_route, locale, auth,
+            lambda: self._serialize(self._get_fields(admin))
+        )
+        self.form = serialized_step_cache.get(
+            'OpenFormView.form', self.admin_route, locale, auth,
+            lambda: self._serialize(admin.get_form_display())
+        )
         self.qml = admin.qml_form
         if proxy is None:
             proxy = admin.get_proxy([value])
@@ -108,6 +119,18 @@ class OpenFormView(AbstractCrudView):
         model_context.current_row = self.row
         model_context.selection_count = 1
 
+    @staticmethod
+    def _serialize(value):
+        return Fragment(json_encoder.encode(DataclassSerializable._asdict_inner(value)))
+
+    def _get_fields(self, admin):
+        return [[f, {
+            'hide_title':fa.get('hide_title', False),
+            'verbose_name':str(fa['name']),
+            'column_span': fa.get('column_span', 1),
+            'minimum_columns': self._minimum_columns(admin, fa),
+            }] for f, fa in admin.get_fields()]
+
     def _minimum_columns(self, admin, fa):
         # Make rich text fields span 3 columns minimum,
         # not to wide to avoid overlap with pdf preview,
@@ -40,9 +40,8 @@ from ...admin.admin_route import Route, RouteWithRenderHint
 from ...admin.action import ActionStep, State
 from ...admin.action.application_action import model_context_naming, model_context_counter
 from ...admin.model_context import ObjectsModelContext
-from ...core.cache import ValueCache
 from ...core.item_model import AbstractModelProxy
-from ...core.naming import initial_naming_context
+from ...core.naming import initial_naming_context, NamingException
 from ...core.qt import Qt, QtCore
 from ...core.serializable import DataclassSerializable
 from ...core.utils import ugettext_lazy
@@ -96,10 +95,12 @@ class AbstractCrudView(ActionStep, DataclassSerializable):
 
     @staticmethod
     def _add_action_states(model_context, actions, action_states):
-        for action_route in actions:
-            action = initial_naming_context.resolve(action_route.route)
+        routes = [action_route.route for action_route in actions]
+        for route, action in zip(routes, initial_naming_context.resolve_many(routes)):
+            if isinstance(action, NamingException):
+                raise action
             state = action.get_state(model_context)
-            action_states.append((action_route.route, state))
+            action_states.append((route, state))
 
     def get_objects(self):
         """Use this method to get access to the objects to change in unit tests
@@ -216,10 +217,25 @@ class SetSelection(ActionStep, DataclassSerializable):
 class RefreshItemView(ActionStep, DataclassSerializable):
     """
     Refresh only the current item view
+
+    :param incremental: instead of replacing the cache of the item view,
+        mark its values as stale.  The client keeps its cell data and only
+        requests the visible rows again.  The handler of those row data
+        requests should re-read the rows for which
+        :meth:`camelot.core.cache.ValueCache.is_stale` is `True`, as returned
+        by :meth:`camelot.admin.model_context.ObjectsModelContext.get_stale_rows`,
+        and only send the changed columns returned by
+        :meth:`camelot.core.cache.ValueCache.add_data`.
     """
 
     model_context: InitVar[Any]
+    incremental: bool = False
     blocking: bool = False
 
     def __post_init__(self, model_context):
-        model_context.item_cache = ValueCache(model_context.item_cache.max_entries)
+        if self.incremental:
+            model_context.item_cache.mark_stale()
+            return
+        model_context.item_cache.clear()
+        if model_context.sent_cells is not None:
+            model_context.sent_cells.clear()
@@ -51,6 +51,7 @@ import logging
 import typing
 
 from ...admin.action.base import ActionStep
+from ...core.cache import shared_value_store
 from ...core.naming import CompositeName, initial_naming_context
 from ...core.serializable import DataclassSerializable
 
@@ -75,6 +76,8 @@ class CreateUpdateDelete(ActionStep, DataclassSerializable):
     created: typing.Union[CompositeName, None] = field(init=False, default=None)
 
     def __post_init__(self, objects_deleted, objects_updated, objects_created):
+        for obj in itertools.chain(objects_deleted, objects_updated):
+            shared_value_store.invalidate(obj)
         if len(objects_deleted):
             self.deleted = leases.bind(str(next(self._lease_counter)), objects_deleted)
         if len(objects_updated):
@@ -10,7 +10,19 @@ from camelot.core.qt import Qt, QtGui
 from camelot.core.serializable import DataclassSerializable
 
 from dataclasses import dataclass, field, InitVar
-from typing import Any, Dict, List, Optional
+import itertools
+from typing import Any, Dict, List, Optional, Union
+
+def _same_value(value, other):
+    return (value is other) or ((type(value) is type(other)) and (value == other))
+
+def _flags_value(flags):
+    """
+    :return: the integer value of item flags, which are either an `int`, or a
+        `Qt.ItemFlag` combination, which is an `enum.Flag` and no `int`
+    """
+    return flags if isinstance(flags, int) else flags.value
+
 
 @dataclass
 class DataCell(DataclassSerializable):
@@ -21,6 +33,23 @@ class DataCell(DataclassSerializable):
 
     roles: Dict[int, Any] = field(default_factory=dict)
 
+    def role_delta(self, flags, roles):
+        """
+        :param flags: the integer value of the flags previously sent for this cell
+        :param roles: a `dict` with the role values previously sent for this cell
+
+        :return: a `DataCell` with only the roles that changed, or `None` if
+            neither the flags nor the roles changed
+        """
+        changed_roles = {
+            role: value for role, value in self.roles.items() if (
+                (role not in roles) or not _same_value(value, roles[role])
+            )
+        }
+        if (_flags_value(self.flags) == flags) and not len(changed_roles):
+            return None
+        return DataCell(row=self.row, column=self.column, flags=self.flags, roles=changed_roles)
+
     # used in camelot tests
     def get_standard_item(self):
         item = QtGui.QStandardItem()
@@ -44,18 +73,180 @@ class DataRowHeader(DataclassSerializable):
     display: Optional[str] = None
 
 
+@dataclass
+class DataColumnCells(DataclassSerializable):
+    """
+    The cells of a single column, in a compact columnar format, with the
+    flags and role values of the cells as arrays parallel to their rows.
+
+    Values that are the same for all cells of the column are sent only once,
+    as a default for the column, or not at all if they match the value in the
+    `invalid_item` template.  When reassembling the cells, roles that are
+    neither in the defaults nor in the parallel arrays take the value of the
+    template, so roles missing from a cell are reassembled as the template
+    value, or as `None` if the role is not in the template.
+
+    .. attribute:: flags
+
+        the flags of all cells if they are the same, otherwise a list with
+        the flags of each cell
+    """
+
+    column: int
+    rows: List[int] = field(default_factory=list)
+    flags: Union[int, List[int]] = 0
+    defaults: Dict[int, Any] = field(default_factory=dict)
+    roles: Dict[int, List[Any]] = field(default_factory=dict)
+
+    @classmethod
+    def from_cells(cls, column, cells):
+        """
+        :param column: the column of the cells
+        :param cells: a list of `DataCell` objects within this column
+        """
+        column_cells = cls(column, [cell.row for cell in cells])
+        flags = [_flags_value(cell.flags) for cell in cells]
+        if all(f == flags[0] for f in flags):
+            column_cells.flags = flags[0] if len(flags) else 0
+        else:
+            column_cells.flags = flags
+        role_keys = dict()
+        for cell in cells:
+            role_keys.update(dict.fromkeys(cell.roles))
+        template = invalid_item.roles
+        for role in role_keys:
+            values = [cell.roles.get(role, template.get(role)) for cell in cells]
+            first = values[0]
+            if all(_same_value(first, value) for value in values):
+                if (role not in template) or not _same_value(first, template[role]):
+                    column_cells.defaults[role] = first
+            else:
+                column_cells.roles[role] = values
+        return column_cells
+
+    def to_cells(self):
+        """
+        Reassemble the cells of this column
+
+        :return: a list of `DataCell` objects
+        """
+        cells = []
+        for i, row in enumerate(self.rows):
+            cell = DataCell(
+                row=row, column=self.column,
+                flags=Qt.ItemFlag(self.flags[i] if isinstance(self.flags, list) else self.flags),
+            )
+            cell.roles.update(invalid_item.roles)
+            cell.roles.update(self.defaults)
+            for role, values in self.roles.items():
+                cell.roles[role] = values[i]
+            cells.append(cell)
+        return cells
+
+
 @dataclass
 class DataUpdate(DataclassSerializable):
+    """
+    :param changed_ranges: a list of `(row, header_item, cells)` tuples
+    :param columnar: send the cells in columnar format, as a list of
+        `DataColumnCells` in the `columns` attribute instead of as a list of
+        `DataCell` in the `cells` attribute.
+    :param sent_cells: a :class:`camelot.core.cache.ValueCache` with the
+        cells previously sent to the view, keyed by the object of the row
+        header.  When given, only the cells and roles that changed since then
+        are sent, and the cache is updated with the new values.  This cannot
+        be combined with the columnar format.
+
+    .. attribute:: delta
+
+        `True` if the cells contain only the changed roles, in which case
+        they should be merged into the existing data of the view
+    """
 
     changed_ranges: InitVar
 
     header_items: List[DataRowHeader] = field(default_factory=list)
     cells: List[DataCell] = field(default_factory=list)
+    columnar: InitVar[bool] = False
+    columns: List[DataColumnCells] = field(default_factory=list)
+    sent_cells: InitVar[Optional[Any]] = None
+    delta: bool = False
 
-    def __post_init__(self, changed_ranges):
+    def __post_init__(self, changed_ranges, columnar, sent_cells):
+        if columnar and (sent_cells is not None):
+            raise ValueError('Delta updates cannot be sent in columnar format')
+        if sent_cells is not None:
+            self.delta = True
+            for row, header_item, items in changed_ranges:
+                self.header_items.append(header_item)
+                self.cells.extend(self._role_delta(sent_cells, row, header_item.object, items))
+            return
         for row, header_item, items in changed_ranges:
             self.header_items.append(header_item)
             self.cells.extend(items)
+        if columnar:
+            cells_by_column = dict()
+            for cell in self.cells:
+                cells_by_column.setdefault(cell.column, []).append(cell)
+            self.columns.extend(
+                DataColumnCells.from_cells(column, cells) for column, cells in sorted(cells_by_column.items())
+            )
+            self.cells = []
+
+    @classmethod
+    def chunks(cls, changed_ranges, chunk_size=50, **kwargs):
+        """
+        Create the updates for the changed ranges in chunks, each chunk is
+        created only when the previous one has been consumed.  When the
+        changed ranges are produced lazily, the first rows can be sent while
+        the next ones are still being created.
+
+        :param changed_ranges: an iterable of `(row, header_item, cells)` tuples
+        :param chunk_size: the maximum number of rows in each chunk
+        :param kwargs: additional arguments to create each update with
+
+        :return: a generator of updates of type cls
+        """
+        changed_ranges = iter(changed_ranges)
+        while True:
+            chunk = list(itertools.islice(changed_ranges, chunk_size))
+            if not len(chunk):
+                return
+            yield cls(chunk, **kwargs)
+
+    @staticmethod
+    def _role_delta(sent_cells, row, obj, cells):
+        """
+        :return: a list with the changed parts of the cells in a row
+        """
+        previous = sent_cells.get_entity_data(obj, row)
+        delta = []
+        sent = dict()
+        for cell in cells:
+            previous_cell = previous.get(cell.column)
+            if previous_cell is None:
+                delta.append(cell)
+                sent[cell.column] = (_flags_value(cell.flags), dict(cell.roles))
+                continue
+            flags, roles = previous_cell
+            cell_delta = cell.role_delta(flags, roles)
+            if cell_delta is not None:
+                delta.append(cell_delta)
+                roles = dict(roles)
+                roles.update(cell_delta.roles)
+                sent[cell.column] = (_flags_value(cell.flags), roles)
+        if len(sent) or not len(previous):
+            sent_cells.add_data(row, obj, sent)
+        return delta
+
+    def get_cells(self):
+        """
+        :return: all cells of the update, including those in columnar format
+        """
+        cells = list(self.cells)
+        for column_cells in self.columns:
+            cells.extend(column_cells.to_cells())
+        return cells
 
 
 invalid_item = DataCell()
@@ -8,7 +8,7 @@ from ..core.exception import CancelRequest, GuiException
 from ..core.naming import (
     CompositeName, NamingException, NameNotFoundException, initial_naming_context
 )
-from ..core.serializable import NamedDataclassSerializable, Serializable
+from ..core.serializable import NamedDataclassSerializable, Serializable, json_encoder
 
 LOGGER = logging.getLogger('camelot.view.requests')
 
@@ -25,6 +25,8 @@ class ModelRun(object):
         self.model_context = model_context
 
 model_run_names = initial_naming_context.bind_new_context('model_run')
+leases = initial_naming_context.resolve_context('leases')
+images = initial_naming_context.resolve_context('image')
 
 
 class AbstractClientConnection(object):
@@ -54,6 +56,9 @@ class AbstractClientConnection(object):
             raise
         except:
             LOGGER.error('Unhandled event in model process')
+        # Driven by the requests, expired leases are unbound at most once per
+        # tick of the lease timer wheel.
+        leases.sweep()
 
 
 class AbstractRequest(NamedDataclassSerializable):
@@ -63,10 +68,8 @@ class AbstractRequest(NamedDataclassSerializable):
 
     @classmethod
     def handle_request(cls, request, connection: AbstractClientConnection):
-        request_type_name, request_data = orjson.loads(request)
-        request_type = NamedDataclassSerializable.get_cls_by_name(
-            request_type_name
-        )
+        request_type_key, request_data = orjson.loads(request)
+        request_type = NamedDataclassSerializable.get_cls(request_type_key)
         request_type.execute(request_data, connection)
 
     @classmethod
@@ -123,6 +126,7 @@ class AbstractRequest(NamedDataclassSerializable):
         :param *args: the arguments to use when calling the generator method.
         """
         from ..admin.action import ActionStep
+        from .action_steps import SerializedStep
         from .responses import ActionStepped
         try:
             run_name = tuple(request_data['run_name'])
@@ -139,10 +143,13 @@ class AbstractRequest(NamedDataclassSerializable):
             while True:
                 if isinstance(result, ActionStep):
                     run.last_step = result
+                    if isinstance(result, SerializedStep):
+                        step = (result.step_type, result.fragment)
+                    else:
+                        step = (type(result).__name__, result)
                     connection.send_response(ActionStepped(
                         run_name=run_name, gui_run_name=gui_run_name,
-                        step=(type(result).__name__, result),
-                        blocking=result.blocking,
+                        step=step, blocking=result.blocking,
                     ))
                     if result.blocking:
                         # this step is blocking, interrupt the loop
@@ -296,8 +303,54 @@ class Unbind(AbstractRequest):
 
     @classmethod
     def execute(cls, request_data, connection: AbstractClientConnection):
-        for lease in request_data['names']:
+        names = [tuple(name) for name in request_data['names']]
+        for name, result in zip(names, initial_naming_context.unbind_many(names)):
+            if isinstance(result, NameNotFoundException):
+                LOGGER.warn('received unbind request for non bound lease : {}'.format(name))
+            elif isinstance(result, NamingException):
+                LOGGER.error('could not unbind lease {} : {}'.format(name, result))
+
+
+@dataclass
+class RequestTypeIds(AbstractRequest):
+    """
+    Handshake after which requests and responses can use the numeric type
+    ids of the serializable classes instead of their names.  The server sends
+    the table with the type ids to the client, and from then on serializes
+    objects with their type id.
+    """
+
+    @classmethod
+    def execute(cls, request_data, connection: AbstractClientConnection):
+        from .responses import TypeIds
+        type_names = NamedDataclassSerializable.get_type_names()
+        connection.send_response(TypeIds(type_names=type_names))
+        json_encoder.known_type_ids = len(type_names)
+
+
+@dataclass
+class FetchImage(AbstractRequest):
+    """
+    Fetch an image that was serialized as a route, because the encoder runs
+    with `image_routes` enabled.  The image data is `None` if the image is no
+    longer available.  Only routes within the 'image' naming context are
+    resolved, so no other bound objects can be fetched.
+    """
+
+    route: CompositeName
+
+    @classmethod
+    def execute(cls, request_data, connection: AbstractClientConnection):
+        from .responses import ImageData
+        route = tuple(request_data['route'])
+        data = None
+        if (len(route) != 2) or (route[0] != 'image'):
+            LOGGER.error('received fetch request for a route outside the image context : {}'.format(route))
+        else:
             try:
-                initial_naming_context.unbind(tuple(lease))
+                data = images.resolve(route[1])
             except NameNotFoundException:
-                LOGGER.warn('received unbind request for non bound lease : {}'.format(lease))
+                LOGGER.warn('received fetch request for non bound image : {}'.format(route))
+            except NamingException as e:
+                LOGGER.error('received fetch request for invalid image route {} : {}'.format(route, e))
+        connection.send_response(ImageData(route=route, data=data))
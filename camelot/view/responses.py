@@ -28,6 +28,25 @@ class Ready(AbstractResponse):
     model_context: typing.Optional[CompositeName]
 
 
+@dataclass
+class TypeIds(AbstractResponse):
+    """
+    The names of the registered serializable classes, the index of each
+    name is its numeric type id.  Once this response is sent, objects of
+    these classes are serialized with their type id instead of their name.
+    """
+    type_names: typing.List[str]
+
+
+@dataclass
+class ImageData(AbstractResponse):
+    """
+    An encoded image, as requested by the client with its route.
+    """
+    route: CompositeName
+    data: typing.Optional[str]
+
+
 @dataclass
 class Busy(AbstractResponse):
     busy: bool
@@ -40,6 +59,8 @@ class ActionStepped(AbstractResponse):
     # @todo : blocking should be a correlation id instead of a bool, so
     # the server can validate if the response is for the correct step
     blocking: bool
+    # step can also be a (name, Fragment) tuple, with a step that was
+    # serialized before using its encode_fragment method
     step: NamedDataclassSerializable
 
 